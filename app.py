@@ -12,7 +12,9 @@ import json
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.main import CodeCrewOrchestrator
+import requests
+
+from src.api_client import CodeCrewClient, ServerBusy
 
 # Page configuration
 st.set_page_config(
@@ -59,8 +61,8 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
-if "orchestrator" not in st.session_state:
-    st.session_state.orchestrator = CodeCrewOrchestrator(verbose=False)
+if "client" not in st.session_state:
+    st.session_state.client = CodeCrewClient()
 
 if "result" not in st.session_state:
     st.session_state.result = None
@@ -86,14 +88,40 @@ with st.sidebar:
         value=3,
         help="Maximum number of refinement iterations"
     )
-    st.session_state.orchestrator.max_iterations = max_iterations
+    
+    mode = st.selectbox(
+        "Mode",
+        ["standard", "fast", "verified", "combined", "speculative"],
+        help="standard: Developer → QA → Reviewer; verified: sandboxed tests; combined: both"
+    )
     
     verbose_mode = st.checkbox(
         "Verbose Mode",
         value=False,
-        help="Show detailed agent logs"
+        help="Show the raw job status from the server"
     )
-    st.session_state.orchestrator.verbose = verbose_mode
+    
+    st.markdown("---")
+    st.markdown("## 🕘 Run History")
+    try:
+        history_filter = st.selectbox("Status", ["All", "VERIFIED_PASSED", "completed", "TESTS_FAILED",
+                                                 "STATIC_CHECK_FAILED", "generated"])
+        history_search = st.text_input("Search queries", "")
+        past_runs = st.session_state.client.history(
+            limit=50, status=None if history_filter == "All" else history_filter,
+            search=history_search or None)
+        if past_runs:
+            picked = st.selectbox(
+                "Past runs",
+                past_runs,
+                format_func=lambda r: f"#{r['id']} {r['created'][5:16]} {r['status']} - {r['query'][:40]}"
+            )
+            if st.button("Open run", use_container_width=True):
+                st.session_state.result = st.session_state.client.run(picked['id'])
+        else:
+            st.caption("No matching runs yet")
+    except requests.RequestException:
+        st.caption(f"Server not reachable at {st.session_state.client.base_url}")
     
     st.markdown("---")
     st.markdown("## 📋 About This System")
@@ -150,19 +178,19 @@ with col3:
         markdown_content = f"""# Code Generation Result
 
 ## Query
-{result['user_query']}
+{result['query']}
 
 ## Status
-{result['final_status']}
+{result['status']}
 
 ## Final Code
 ```python
-{result['final_code']}
+{result['code']}
 ```
 
 ## Metadata
 - Total Iterations: {result['metadata']['total_iterations']}
-- Duration: {result['metadata']['duration']}
+- Duration: {result['metadata']['duration']}s
 - Start Time: {result['metadata']['start_time']}
 """
         st.download_button(
@@ -187,92 +215,67 @@ if st.session_state.processing and user_query:
         # Create placeholders for progress display
         progress_placeholder = st.empty()
         status_placeholder = st.empty()
-        phase_placeholder = st.empty()
+        stream_placeholder = st.empty()
         
-        # Overall progress bar
-        max_steps = (1 + st.session_state.orchestrator.max_iterations * 3)  # 1 generation + (iterations * 3 phases)
-        current_step = 0
+        # Stages each mode goes through, for the progress bar
+        mode_stages = {
+            'fast': ['generate'],
+            'standard': ['generate', 'qa', 'review'],
+            'verified': ['generate', 'scenarios', 'tests'],
+            'combined': ['generate', 'qa', 'scenarios', 'tests', 'review'],
+            'speculative': ['generate', 'scenarios', 'tests'],
+        }[mode]
+        stage_titles = {
+            'recall': '🔎 Looking Up Similar Requests',
+            'generate': '👨‍💻 Code Generation',
+            'static_check': '🧹 Static Checks',
+            'qa': '🔍 QA & Debugging',
+            'confidence': '📊 Confidence Score',
+            'review': '✅ Review & Validation',
+            'scenarios': '🧪 Test Scenarios',
+            'tests': '▶️ Test Run',
+            'tests_agent': '▶️ Test Run (LLM)',
+        }
         
-        class StreamlitProgressTracker:
-            """Custom tracker to update Streamlit progress"""
-            def __init__(self, max_steps, progress_ph, status_ph, phase_ph):
-                self.max_steps = max_steps
-                self.current_step = 0
-                self.progress_ph = progress_ph
-                self.status_ph = status_ph
-                self.phase_ph = phase_ph
-                self.phase_icons = {
-                    'generation': '👨‍💻',
-                    'debugging': '🔍',
-                    'validation': '✅',
-                    'regeneration': '♻️'
-                }
-            
-            def update(self, phase, iteration=None, message=""):
-                self.current_step += 1
-                progress = min(self.current_step / self.max_steps, 0.99)
-                
-                icon = self.phase_icons.get(phase, '⚙️')
-                phase_display = {
-                    'generation': 'Code Generation',
-                    'debugging': 'QA & Debugging',
-                    'validation': 'Review & Validation',
-                    'regeneration': 'Code Regeneration'
-                }.get(phase, phase.upper())
-                
-                # Update progress bar
-                with self.progress_ph.container():
-                    st.progress(progress)
-                    st.caption(f"Progress: {int(progress * 100)}%")
-                
-                # Update status
-                status_text = f"{icon} **Current Phase:** {phase_display}"
-                if iteration:
-                    status_text += f" (Iteration {iteration})"
-                
-                with self.status_ph.container():
+        def show_status(job):
+            if job['status'] == 'queued':
+                with status_placeholder.container():
+                    st.info("⏳ **Queued** - waiting for a free worker")
+                return
+            # Progress comes from the orchestrator's stage events, not from log text
+            finished = {e['stage'].split('#')[0] for e in job['events'] if e['kind'] == 'stage_finished'}
+            started = [e for e in job['events'] if e['kind'] == 'stage_started' and e['stage'] in stage_titles]
+            progress = min(len(finished & set(mode_stages)) / len(mode_stages), 0.99)
+            with progress_placeholder.container():
+                st.progress(progress)
+                st.caption(f"Progress: {int(progress * 100)}%")
+            if started:
+                current = started[-1]
+                status_text = f"**Current Phase:** {stage_titles[current['stage']]}"
+                if current['iteration'] > 1:
+                    status_text += f" (Iteration {current['iteration']})"
+                with status_placeholder.container():
                     st.info(status_text)
-                
-                # Update phase details
-                if message:
-                    with self.phase_ph.container():
-                        st.write(f"📝 {message}")
-        
-        tracker = StreamlitProgressTracker(max_steps, progress_placeholder, status_placeholder, phase_placeholder)
-        
-        # Monkey-patch the orchestrator to report progress
-        original_log = st.session_state.orchestrator._log
-        iteration_counter = [0]
-        
-        def progress_log(message: str):
-            original_log(message)
-            
-            # Track phases
-            if "PHASE 1: CODE GENERATION" in message:
-                tracker.update('generation', message="Generating initial code...")
-            elif "PHASE 2: QA & DEBUGGING" in message:
-                tracker.update('debugging', iteration=iteration_counter[0], message="Analyzing code for bugs and issues...")
-            elif "PHASE 3: REVIEW & VALIDATION" in message:
-                tracker.update('validation', iteration=iteration_counter[0], message="Validating against requirements...")
-            elif "ITERATION" in message and "==" in message:
-                iteration_num = message.split("ITERATION")[1].split("=")[0].strip()
-                if iteration_num.isdigit():
-                    iteration_counter[0] = int(iteration_num)
-        
-        st.session_state.orchestrator._log = progress_log
+            if job['output']:
+                with stream_placeholder.container():
+                    st.caption(f"✍️ Live output: {job['stage']}")
+                    st.code(job['output'], language="markdown")
         
+        client = st.session_state.client
         try:
-            # Run orchestrator
-            st.session_state.result = st.session_state.orchestrator.process_request(user_query)
+            # Hand the request to the job server and follow it until it finishes
+            job = client.submit(user_query, mode=mode, max_iterations=max_iterations)
+            st.session_state.job_id = job['id']
+            st.session_state.result = client.wait(job['id'], on_status=show_status)
             
             # Final progress update
-            tracker.current_step = tracker.max_steps
             with progress_placeholder.container():
                 st.progress(1.0)
                 st.caption("Progress: 100%")
             
             with status_placeholder.container():
                 st.success("✅ **Pipeline Complete!**")
+            stream_placeholder.empty()
             
             # Display results
             st.markdown("## ✅ Results")
@@ -284,15 +287,15 @@ if st.session_state.processing and user_query:
                 result = st.session_state.result
                 
                 # Status badge
-                status_color = "green" if result['final_status'] == "APPROVED" else "orange"
+                status_color = "green" if result['status'] in ("completed", "VERIFIED_PASSED") else "orange"
                 st.markdown(f"""
-                ### Status: :{status_color}[{result['final_status']}]
+                ### Status: :{status_color}[{result['status']}]
                 
-                **Query:** {result['user_query']}
+                **Query:** {result['query']}
                 
                 **Iterations:** {result['metadata']['total_iterations']}
                 
-                **Duration:** {result['metadata']['duration']}
+                **Duration:** {result['metadata']['duration']}s
                 
                 **Start Time:** {result['metadata']['start_time']}
                 """)
@@ -300,23 +303,37 @@ if st.session_state.processing and user_query:
             with tab2:
                 result = st.session_state.result
                 st.markdown("### Generated Code")
-                st.code(result['final_code'], language="python")
+                st.code(result['code'], language="python")
             
             with tab3:
                 result = st.session_state.result
                 st.markdown("### Detailed Iteration Log")
                 
-                for idx, iteration in enumerate(result['iterations']):
-                    phase = iteration.get('phase', 'unknown')
+                stage_outputs = {
+                    'generate': result.get('code', ''),
+                    'qa': result.get('feedback', ''),
+                    'review': result.get('review') or '',
+                    'confidence': json.dumps(result.get('confidence', {}), indent=2),
+                    'scenarios': result.get('scenarios', ''),
+                    'tests': result.get('results', ''),
+                    'tests_agent': result.get('results', '')
+                }
+                
+                for stage in result['metadata']['stages']:
+                    phase = stage['stage']
                     phase_title = {
-                        'generation': '👨‍💻 Code Generation',
-                        'debugging': '🔍 QA Debugging',
-                        'validation': '✅ Validation',
-                        'regeneration': '♻️ Regeneration'
+                        'generate': '👨‍💻 Code Generation',
+                        'qa': '🔍 QA Debugging',
+                        'review': '✅ Validation',
+                        'confidence': '📊 Confidence Score',
+                        'scenarios': '🧪 Test Scenarios',
+                        'tests': '▶️ Test Run',
+                        'tests_agent': '▶️ Test Run (LLM)'
                     }.get(phase, phase.upper())
                     
-                    with st.expander(f"{phase_title} - Iteration {iteration.get('iteration', idx + 1)}", expanded=False):
-                        st.text(iteration['output'][:500] + "..." if len(iteration['output']) > 500 else iteration['output'])
+                    with st.expander(f"{phase_title} - Iteration {stage['iteration']} ({stage['wall_time']}s)", expanded=False):
+                        output = stage_outputs.get(phase, '')
+                        st.text(output[:500] + "..." if len(output) > 500 else output)
             
             with tab4:
                 result = st.session_state.result
@@ -325,24 +342,47 @@ if st.session_state.processing and user_query:
                 timeline_data = {
                     'Start': result['metadata']['start_time'],
                     'End': result['metadata']['end_time'],
-                    'Duration': result['metadata']['duration'],
+                    'Duration': f"{result['metadata']['duration']}s",
                     'Total Iterations': result['metadata']['total_iterations']
                 }
                 
                 for key, value in timeline_data.items():
                     st.metric(key, value)
+                
+                st.markdown("#### Per-Stage Breakdown")
+                st.table([
+                    {
+                        'Stage': s['stage'],
+                        'Iteration': s['iteration'],
+                        'Wall (s)': s['wall_time'],
+                        'TTFT (s)': s['ttft'],
+                        'Prompt Tokens': s['prompt_tokens'],
+                        'Completion Tokens': s['completion_tokens'],
+                        'Tokens/s': s['tokens_per_sec'],
+                        'Cache Hit': s['cache_hit']
+                    }
+                    for s in result['metadata']['stages']
+                ])
             
             st.session_state.processing = False
             
+        except ServerBusy as e:
+            st.warning(f"⏳ The server is busy with other requests - try again in {e.retry_after}s")
+            st.session_state.processing = False
+        except requests.ConnectionError:
+            st.error(f"❌ Cannot reach the CodeCrew server at {client.base_url} - start it with `python -m src.server`")
+            st.session_state.processing = False
         except Exception as e:
             st.error(f"❌ Error during processing: {str(e)}")
             st.session_state.processing = False
 
-# Display execution history if in verbose mode
-if st.session_state.orchestrator.execution_history and verbose_mode:
-    with st.expander("📜 Execution History", expanded=False):
-        history_text = "\n".join(st.session_state.orchestrator.execution_history)
-        st.code(history_text, language="text")
+# Show the raw job status if in verbose mode
+if st.session_state.get("job_id") and verbose_mode:
+    with st.expander("📜 Job Status", expanded=False):
+        try:
+            st.json(st.session_state.client.status(st.session_state.job_id))
+        except requests.RequestException:
+            st.caption("Job no longer available on the server")
 
 # Footer
 st.markdown("---")
@@ -0,0 +1 @@
+"""Benchmarks for CodeCrew - run from the repository root with python -m benchmarks.<name>"""
@@ -0,0 +1,196 @@
+"""
+Pipeline Benchmark - Measures orchestration overhead against a stub Ollama server
+
+Drives process_request_fast / process_request / process_request_verified
+over a corpus of queries at several concurrency levels and reports p50/p95
+latency, requests/sec and a per-stage breakdown. With --baseline the run is
+compared against a saved result and exits non-zero on a regression.
+With --nodes the calls are balanced over several stub servers on their own
+ports, and --fail-node makes one of them answer 503 once the warm-up is done.
+
+Run: python -m benchmarks.bench_pipeline --modes fast standard verified --concurrency 1 4
+     python -m benchmarks.bench_pipeline --save-baseline benchmarks/baseline.json
+     python -m benchmarks.bench_pipeline --baseline benchmarks/baseline.json
+     python -m benchmarks.bench_pipeline --nodes 3 --fail-node
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_ollama import StubOllamaServer, load_recorded
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODES = ("fast", "standard", "verified", "combined")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["query"] for line in f if line.strip()]
+
+
+def run_level(orchestrator_factory, mode, queries, concurrency, requests):
+    """Run `requests` queries in `mode` with `concurrency` workers"""
+    def one(i):
+        orchestrator = orchestrator_factory()
+        run = getattr(orchestrator, {
+            "fast": "process_request_fast",
+            "standard": "process_request",
+            "verified": "process_request_verified",
+            "combined": "process_request_combined",
+        }[mode])
+        started = time.perf_counter()
+        result = run(queries[i % len(queries)])
+        return time.perf_counter() - started, result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [lat for lat, _ in outcomes]
+    stage_times = {}
+    for _, result in outcomes:
+        for stage in result.get("metadata", {}).get("stages", []):
+            stage_times.setdefault(stage["stage"], []).append(stage["wall_time"])
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": requests,
+        "p50": round(percentile(latencies, 50), 4),
+        "p95": round(percentile(latencies, 95), 4),
+        "mean": round(statistics.mean(latencies), 4),
+        "rps": round(requests / elapsed, 2),
+        "stages": {name: round(statistics.mean(times), 4) for name, times in stage_times.items()},
+        "statuses": sorted({r.get("status") for _, r in outcomes}),
+    }
+
+
+def compare(results, baseline, tolerance, slack):
+    """Return a list of regression messages (empty if none)"""
+    previous = {(r["mode"], r["concurrency"]): r for r in baseline["results"]}
+    problems = []
+    for r in results:
+        old = previous.get((r["mode"], r["concurrency"]))
+        if old is None:
+            continue
+        for key in ("p50", "p95"):
+            limit = old[key] * (1 + tolerance) + slack
+            if r[key] > limit:
+                problems.append(f"{r['mode']} x{r['concurrency']} {key}: "
+                                f"{r[key]:.4f}s > {limit:.4f}s (baseline {old[key]:.4f}s)")
+    return problems
+
+
+def print_table(results):
+    print(f"\n{'mode':<10}{'conc':>5}{'p50 (s)':>10}{'p95 (s)':>10}{'req/s':>9}  stages (mean s)")
+    print("-" * 90)
+    for r in results:
+        stages = ", ".join(f"{k}={v:.3f}" for k, v in r["stages"].items())
+        print(f"{r['mode']:<10}{r['concurrency']:>5}{r['p50']:>10.4f}{r['p95']:>10.4f}{r['rps']:>9.2f}  {stages}")
+
+
+def print_nodes(servers):
+    """Balancer view of every stub next to the generations the stub served"""
+    from src.llm.balancer import node_stats
+
+    served = {server.url: server.requests for server in servers}
+    print(f"\n{'node':<26}{'served':>8}{'errors':>8}{'ejected':>9}{'p50 (s)':>10}{'p95 (s)':>10}")
+    print("-" * 71)
+    for node in node_stats():
+        p50, p95 = (f"{node[k]:.4f}" if node[k] is not None else "-" for k in ("latency_p50", "latency_p95"))
+        print(f"{node['url']:<26}{served.get(node['url'], 0):>8}{node['errors']:>8}"
+              f"{str(node['ejected']):>9}{p50:>10}{p95:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CodeCrew pipeline against a stub Ollama")
+    parser.add_argument("--modes", nargs="+", default=["fast", "standard", "verified"], choices=MODES)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--requests", type=int, default=8, help="requests per (mode, concurrency)")
+    parser.add_argument("--corpus", default=os.path.join(HERE, "corpus.jsonl"))
+    parser.add_argument("--latency", type=float, default=0.05, help="stub seconds to first token")
+    parser.add_argument("--rate", type=float, default=500.0, help="stub tokens per second")
+    parser.add_argument("--responses", help="recorded responses JSONL for the stub")
+    parser.add_argument("--backend", choices=["direct", "crewai"], default="direct")
+    parser.add_argument("--nodes", type=int, default=1, help="stub servers to balance over")
+    parser.add_argument("--fail-node", action="store_true", help="one stub fails after the warm-up")
+    parser.add_argument("--baseline", help="compare against this saved result")
+    parser.add_argument("--save-baseline", help="write results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--slack", type=float, default=0.01, help="allowed absolute slowdown (s)")
+    args = parser.parse_args()
+
+    recorded = load_recorded(args.responses) if args.responses else None
+    servers = [StubOllamaServer(latency=args.latency, rate=args.rate, recorded=recorded).start()
+               for _ in range(max(1, args.nodes))]
+
+    # Config is read at import time, so point it at the stub before importing src
+    os.environ["OLLAMA_BASE_URL"] = ",".join(server.url for server in servers)
+    os.environ["LLM_CACHE"] = "0"
+    os.environ["RUN_HISTORY"] = "0"  # Keep benchmark runs out of the run history
+    os.environ["LLM_MAX_PARALLEL"] = str(max(args.concurrency))
+    from src.main import CodeCrewOrchestrator
+
+    def factory():
+        orchestrator = CodeCrewOrchestrator(verbose=False, use_cache=False, backend=args.backend)
+        orchestrator.max_iterations = 1
+        return orchestrator
+
+    queries = load_corpus(args.corpus)
+    factory().process_request_fast(queries[0])  # Warm up imports and connections
+    if args.fail_node:
+        servers[-1].fail_with = 503
+
+    results = []
+    for mode in args.modes:
+        for concurrency in args.concurrency:
+            results.append(run_level(factory, mode, queries, concurrency, args.requests))
+    for server in servers:
+        server.stop()
+
+    print_table(results)
+    if len(servers) > 1:
+        print_nodes(servers)
+    stub = {"latency": args.latency, "rate": args.rate}
+    if len(servers) > 1:
+        stub.update(nodes=len(servers), fail_node=args.fail_node)
+    report = {
+        "stub": stub,
+        "backend": args.backend,
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[Baseline saved to {args.save_baseline}]")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("stub") != report["stub"]:
+            print("\n[WARN] Baseline was recorded with different stub settings")
+        problems = compare(results, baseline, args.tolerance, args.slack)
+        if problems:
+            print("\nREGRESSIONS:")
+            for p in problems:
+                print(f"  {p}")
+            sys.exit(1)
+        print("\n[OK] No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
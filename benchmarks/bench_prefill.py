@@ -0,0 +1,119 @@
+"""
+Prefill Benchmark - Prompt processing time of the stages that read existing code
+
+Runs QA, review, scenario generation and the testing agent on the same code,
+for several programs, against a stub Ollama that charges for every prompt
+token it has not seen at the start of a cached prompt. Compares the shared
+prefix layout (requirement and code first) with agent framing first, and
+exits non-zero if the reduction is below --min-reduction.
+
+Run: python -m benchmarks.bench_prefill --programs 5 --prefill-rate 1000
+"""
+import argparse
+import os
+import sys
+
+from benchmarks.stub_ollama import StubOllamaServer
+
+
+STAGES = ("qa", "review", "scenarios", "tests_agent")
+
+FUNCTION = '''
+def step_{i}(values, factor={i}):
+    """Scale every number in values by factor and drop the negative results.
+
+    Args:
+        values: An iterable of numbers
+        factor: Multiplier applied to each value
+
+    Raises:
+        TypeError: If values contains something that is not a number
+    """
+    result = []
+    for value in values:
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise TypeError(f"expected a number, got {{value!r}}")
+        scaled = value * factor
+        if scaled >= 0:
+            result.append(scaled)
+    return result
+'''
+
+
+def program(index, functions):
+    """A synthetic listing of a realistic size; each index gives different code"""
+    body = "".join(FUNCTION.format(i=index * 100 + n) for n in range(functions))
+    return f'"""Program {index}"""\n{body}\n\nif __name__ == "__main__":\n    print(step_{index * 100}([1, 2, 3]))\n'
+
+
+def run_stages(orchestrator, query, code):
+    """Every code-reading stage once, on one program; returns the stage records"""
+    from src.metrics import RunMetrics, current_run
+    from src.tasks.testing import create_testing_task
+
+    run = RunMetrics(query, "prefill")
+    token = current_run.set(run)
+    try:
+        feedback = orchestrator.run_qa(code, query)
+        orchestrator.run_review(code, query, feedback)
+        scenarios = orchestrator.generate_scenarios(code, query)
+        orchestrator.run_agent(
+            "testing", lambda tester: create_testing_task(code, scenarios, agent=tester, user_query=query),
+            "tests_agent")
+    finally:
+        current_run.reset(token)
+    return run.stages
+
+
+def measure(server, shared, programs, functions):
+    """Prefill seconds and evaluated prompt tokens per stage for one layout"""
+    import src.engine
+    from src.main import CodeCrewOrchestrator
+
+    src.engine.PROMPT_SHARED_PREFIX = shared
+    server._prompt_cache.clear()
+    orchestrator = CodeCrewOrchestrator(verbose=False, use_cache=False, backend="direct")
+    totals = {stage: [0.0, 0] for stage in STAGES}
+    for index in range(programs):
+        query = f"Program {index}: scale lists of numbers by several factors, dropping negatives"
+        for record in run_stages(orchestrator, query, program(index, functions)):
+            totals[record["stage"]][0] += record["prefill_seconds"]
+            totals[record["stage"]][1] += record["prompt_tokens"]
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--programs", type=int, default=5)
+    parser.add_argument("--functions", type=int, default=4, help="Functions per program (code length)")
+    parser.add_argument("--prefill-rate", type=float, default=1000.0, help="Stub prompt tokens per second")
+    parser.add_argument("--min-reduction", type=float, default=0.3, help="Required drop in total prefill time")
+    args = parser.parse_args()
+
+    server = StubOllamaServer(prefill_rate=args.prefill_rate).start()
+    # Config is read at import time, so point it at the stub before importing src
+    os.environ["OLLAMA_BASE_URL"] = server.url
+    os.environ["LLM_CACHE"] = "0"
+    os.environ["QUERY_INDEX"] = "0"
+    os.environ["RUN_HISTORY"] = "0"
+
+    separate = measure(server, False, args.programs, args.functions)
+    shared = measure(server, True, args.programs, args.functions)
+
+    print(f"{'stage':<12} {'framing first':>22} {'shared prefix':>22}")
+    for stage in STAGES:
+        (s_before, t_before), (s_after, t_after) = separate[stage], shared[stage]
+        print(f"{stage:<12} {s_before:8.2f}s {t_before:7d} tok {s_after:8.2f}s {t_after:7d} tok")
+    before = sum(s for s, _ in separate.values())
+    after = sum(s for s, _ in shared.values())
+    reduction = 1 - after / before if before else 0.0
+    print(f"{'total':<12} {before:8.2f}s {'':11} {after:8.2f}s   ({reduction:.0%} less prefill)")
+
+    server.stop()
+    if reduction < args.min_reduction:
+        print(f"\nREGRESSION: prefill reduced by {reduction:.0%} < {args.min_reduction:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
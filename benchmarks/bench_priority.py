@@ -0,0 +1,142 @@
+"""
+Priority Benchmark - Interactive latency while batch runs occupy the server
+
+Measures fast-mode latency on an idle stub Ollama, then again while
+--batch-workers threads keep running verified requests at batch priority,
+once with the scheduler's defaults and once with every class treated alike
+(no reserved slot, no batch cap). Exits non-zero if interactive p95 under
+batch load exceeds the idle p95 by more than --tolerance plus --slack, or if
+a deadline fallback (with its mode's options, e.g. candidates) fails to run.
+
+Run: python -m benchmarks.bench_priority --requests 10 --batch-workers 4
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+from benchmarks.bench_pipeline import percentile
+from benchmarks.stub_ollama import StubOllamaServer
+
+
+def fast_latencies(factory, requests):
+    """Seconds per fast request, one at a time"""
+    latencies = []
+    for i in range(requests):
+        orchestrator = factory()
+        started = time.perf_counter()
+        orchestrator.process(f"Write a function that returns the {i}th square number", "fast")
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def with_batch_load(factory, workers, measure):
+    """Run measure() while `workers` threads loop over verified requests at batch priority"""
+    stop = threading.Event()
+
+    def loop(index):
+        orchestrator = factory()
+        orchestrator.priority = "batch"
+        orchestrator.user = f"nightly-{index}"
+        n = 0
+        while not stop.is_set():
+            orchestrator.process(f"Write a function that sorts list {index}.{n} by length", "verified")
+            n += 1
+
+    threads = [threading.Thread(target=loop, args=(i,), daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)  # Let the batch fill the slots first
+    try:
+        return measure()
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def check_downgrades(factory):
+    """Run every deadline fallback: each mode is made to look too slow for the deadline"""
+    import src.llm.scheduler as scheduler
+
+    problems = []
+    for mode, options in (("speculative", {"candidates": 2}), ("combined", {}),
+                          ("verified", {}), ("standard", {})):
+        scheduler._default_admission = admission = scheduler.Admission()
+        admission.observe(mode, 3600.0)
+        orchestrator = factory()
+        orchestrator.deadline = 600
+        try:
+            result = orchestrator.process("Write a function that doubles a number", mode, **options)
+        except Exception as e:
+            problems.append(f"{mode}: {type(e).__name__}: {e}")
+            continue
+        if result.get("downgraded_from") != mode:
+            problems.append(f"{mode}: ran without falling back")
+    scheduler._default_admission = None
+    return problems
+
+
+def summary(latencies):
+    return round(percentile(latencies, 50), 4), round(percentile(latencies, 95), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=10, help="fast requests per measurement")
+    parser.add_argument("--batch-workers", type=int, default=4)
+    parser.add_argument("--parallel", type=int, default=2, help="LLM_MAX_PARALLEL (server slots)")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub seconds to first token")
+    parser.add_argument("--rate", type=float, default=300.0, help="stub tokens per second")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative p95 increase")
+    parser.add_argument("--slack", type=float, default=0.05, help="allowed absolute p95 increase (s)")
+    args = parser.parse_args()
+
+    server = StubOllamaServer(latency=args.latency, rate=args.rate).start()
+    # Config is read at import time, so point it at the stub before importing src
+    os.environ["OLLAMA_BASE_URL"] = server.url
+    os.environ["LLM_MAX_PARALLEL"] = str(args.parallel)
+    os.environ["LLM_CACHE"] = "0"
+    os.environ["QUERY_INDEX"] = "0"
+    os.environ["RUN_HISTORY"] = "0"
+    from src.llm.client import llm_slots
+    from src.main import CodeCrewOrchestrator
+
+    def factory():
+        orchestrator = CodeCrewOrchestrator(verbose=False, use_cache=False, backend="direct")
+        orchestrator.max_iterations = 2
+        return orchestrator
+
+    measure = lambda: fast_latencies(factory, args.requests)
+    measure()  # Warm up imports and connections
+    idle = summary(measure())
+    scheduled = summary(with_batch_load(factory, args.batch_workers, measure))
+    limits, reserved = dict(llm_slots.limits), llm_slots.reserved
+    llm_slots.limits = {p: llm_slots.capacity for p in limits}
+    llm_slots.reserved = 0  # Caps and reserve off even while classes overlap
+    unscheduled = summary(with_batch_load(factory, args.batch_workers, measure))
+    llm_slots.limits, llm_slots.reserved = limits, reserved
+    problems = check_downgrades(factory)
+    server.stop()
+
+    print(f"{'fast requests':<34}{'p50 (s)':>10}{'p95 (s)':>10}")
+    print("-" * 54)
+    for label, (p50, p95) in (("idle", idle), ("batch load, priority classes", scheduled),
+                              ("batch load, all classes alike", unscheduled)):
+        print(f"{label:<34}{p50:>10.4f}{p95:>10.4f}")
+    print(f"\nslots: {llm_slots.stats()}")
+
+    limit = idle[1] * (1 + args.tolerance) + args.slack
+    if scheduled[1] > limit:
+        problems.append(f"interactive p95 {scheduled[1]:.4f}s under batch load > {limit:.4f}s")
+    if problems:
+        print("\nREGRESSIONS:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("\n[OK] Deadline fallbacks ran for every mode")
+
+
+if __name__ == "__main__":
+    main()
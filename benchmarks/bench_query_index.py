@@ -0,0 +1,80 @@
+"""
+Query Index Benchmark - Lookup latency of the near-duplicate index at scale
+
+Fills a QueryIndex through add() with synthetic queries and results the size
+of a real one, then times lookup() of paraphrased and unrelated queries: the
+candidate search plus the SQLite row fetch and JSON decoding recall() pays.
+Exits non-zero if the p95 lookup exceeds --budget-ms.
+
+Run: python -m benchmarks.bench_query_index --size 100000 --budget-ms 1
+(filling 100k entries takes about a minute and a half; the default is 20k)
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_pipeline import percentile
+
+
+VOCAB = ("sort list string number prime factorial fibonacci palindrome reverse merge binary "
+         "search tree graph dict parse csv json date time matrix stack queue heap hash count "
+         "word vowel sum average median anagram duplicate interval roman digit calendar").split()
+
+PROBES = [
+    "Write a Python function that calculates the factorial of a number",
+    "generate fibonnaci series using python function.",
+    "check whether a string is a palindrome",
+    "merge two sorted lists into one sorted list",
+    "convert an integer to a roman numeral",
+    "parse a csv file and compute the average of a column",
+]
+
+# A stored result's code, about the size the verified flow produces
+RESULT_CODE = "\n".join(f"def helper_{i}(values):\n    \"\"\"Step {i}\"\"\"\n    return [v * {i} for v in values]\n"
+                        for i in range(20))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=20000, help="Stored queries")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--budget-ms", type=float, default=1.0, help="Allowed p95 lookup time")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from src.tools.query_index import QueryIndex
+
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix="codecrew_index_")
+    index = QueryIndex(os.path.join(workdir, "index.sqlite"))
+
+    started, stored = time.perf_counter(), []
+    for i in range(args.size):
+        query = f"{' '.join(rng.choice(VOCAB) for _ in range(rng.randint(3, 8)))} {i}"
+        index.add(query, {"query": query, "code": RESULT_CODE, "status": "VERIFIED_PASSED"})
+        if i % max(1, args.size // len(PROBES)) == 0:
+            stored.append(query)
+    print(f"Indexed {args.size} queries in {time.perf_counter() - started:.1f}s")
+
+    # Paraphrases of stored queries, so some lookups fetch and decode a result
+    probes = PROBES + [f"write a python function to {query}" for query in stored]
+    timings, hits = [], 0
+    for i in range(args.lookups):
+        probe = probes[i % len(probes)]
+        started = time.perf_counter()
+        match = index.lookup(probe, 0.6)
+        timings.append((time.perf_counter() - started) * 1000)
+        hits += match is not None
+
+    p50, p95 = percentile(timings, 50), percentile(timings, 95)
+    print(f"Lookup: p50 {p50:.3f} ms  p95 {p95:.3f} ms  max {max(timings):.3f} ms  ({hits} matches)")
+    if p95 > args.budget_ms:
+        print(f"\nOVER BUDGET: p95 {p95:.3f} ms > {args.budget_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Startup Benchmark - Import time of the CLI entry point
+
+Runs `python -X importtime -c "import cli"` in fresh interpreters and reports
+the median cumulative import time plus the slowest modules. Exits non-zero if
+it exceeds --budget-ms or if a heavy dependency (crewai, langchain, requests)
+is loaded before the first query.
+
+Run: python -m benchmarks.bench_startup --runs 5 --budget-ms 300
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("crewai", "langchain", "requests")  # Must only load on first use
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(module):
+    """{top-level module: cumulative microseconds} and the self time of every module"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    cumulative, own = {}, {}
+    for match in _LINE.finditer(proc.stderr):
+        self_us, cumulative_us, indent, name = match.groups()
+        own[name] = int(self_us)
+        if len(indent) == 1:
+            cumulative[name] = int(cumulative_us)
+    return cumulative, own
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="cli", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=300.0, help="Allowed median import time")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    totals, slowest = [], {}
+    for _ in range(args.runs):
+        cumulative, own = import_times(args.module)
+        totals.append(cumulative[args.module] / 1000)
+        for name, us in own.items():
+            slowest[name] = min(us, slowest.get(name, us))
+
+    median = statistics.median(totals)
+    print(f"import {args.module}: median {median:.1f} ms  min {min(totals):.1f} ms  ({args.runs} runs)")
+    print("\nSlowest modules (self time):")
+    for name, us in sorted(slowest.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000:7.1f} ms  {name}")
+
+    failed = False
+    loaded = sorted({name.split(".")[0] for name in slowest} & set(HEAVY))
+    if loaded:
+        print(f"\nEAGER IMPORT: {', '.join(loaded)} loaded at startup")
+        failed = True
+    if median > args.budget_ms:
+        print(f"\nOVER BUDGET: {median:.1f} ms > {args.budget_ms} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
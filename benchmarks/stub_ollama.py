@@ -0,0 +1,290 @@
+"""
+Stub Ollama - Local fake of the Ollama REST API for benchmarks
+
+Serves /api/generate (streaming and non-streaming), /api/tags and
+/api/version with canned or recorded responses, a configurable
+time-to-first-token and a configurable token rate. With a prefill rate,
+prompt processing costs time too, except for the part of a prompt that
+matches one cached in a slot, like Ollama's prompt cache. No model, GPU
+or network needed.
+
+Run standalone: python -m benchmarks.stub_ollama --port 11435 --latency 0.2 --rate 50
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+CANNED_CODE = '''```python
+def solve(n):
+    """Return twice n.
+
+    Args:
+        n: An integer
+
+    Raises:
+        TypeError: If n is not an integer
+    """
+    if not isinstance(n, int) or isinstance(n, bool):
+        raise TypeError("n must be an integer")
+    return n * 2
+
+
+if __name__ == "__main__":
+    print(solve(21))
+```'''
+
+CANNED_SCENARIOS = json.dumps([
+    {"test_name": "test_solve_normal", "function": "solve", "inputs": {"n": 21}, "expected": 42, "category": "normal"},
+    {"test_name": "test_solve_edge_zero", "function": "solve", "inputs": {"n": 0}, "expected": 0, "category": "edge"},
+    {"test_name": "test_solve_edge_negative", "function": "solve", "inputs": {"n": -1}, "expected": -2, "category": "edge"},
+    {"test_name": "test_solve_error_none", "function": "solve", "inputs": {"n": None}, "expected": "raises TypeError", "category": "error"},
+])
+
+# Models usually explain their code after the closing fence
+CANNED_EXPLANATION = """
+
+This implementation validates its input before doing any work: booleans are
+rejected explicitly because bool is a subclass of int in Python. The function
+runs in constant time and uses only the standard library. The __main__ block
+shows a minimal usage example that prints 42.
+"""
+
+CANNED_QA = "BUGS FOUND: 0\nNo bugs found. Input validation and error handling are correct.\n\n" + CANNED_CODE
+
+CANNED_REVIEW = "Decision: APPROVED\nIssues: none"
+
+CANNED_TEST_REPORT = "[PASS] test_solve_normal: expected 42, got 42\nSUMMARY: 1/1 passed\nSTATUS: ALL_PASSED"
+
+
+def canned_response(prompt):
+    """Pick a plausible answer for whichever pipeline stage sent the prompt"""
+    if "test scenarios" in prompt:
+        return CANNED_SCENARIOS
+    if "Run these tests" in prompt:
+        return CANNED_TEST_REPORT
+    if "code review" in prompt.lower():
+        return CANNED_REVIEW
+    if "Debug this code" in prompt:
+        return CANNED_QA
+    return CANNED_CODE + CANNED_EXPLANATION
+
+
+def load_recorded(path):
+    """Recorded responses: JSONL lines of {"match": substring, "response": text}"""
+    recorded = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                recorded.append((item["match"], item["response"]))
+    return recorded
+
+
+class StubOllamaServer(ThreadingHTTPServer):
+    """Threaded HTTP server that pretends to be Ollama"""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, rate=0.0,
+                 recorded=None, models=("llama3.2",), prefill_rate=0.0, cache_slots=4):
+        super().__init__((host, port), _Handler)
+        self.latency = latency  # Seconds before the first token
+        self.rate = rate  # Tokens per second after that (0 = instant)
+        self.prefill_rate = prefill_rate  # Uncached prompt tokens per second (0 = instant)
+        self.cache_slots = cache_slots  # Cached prompts per model
+        self._prompt_cache = {}  # model -> token lists of recent prompts, oldest first
+        self.recorded = recorded or []
+        self.models = list(models)
+        self.fail_with = None  # HTTP status every request gets, to play a broken server
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def respond_to(self, prompt):
+        for match, response in self.recorded:
+            if match in prompt:
+                text = response
+                break
+        else:
+            text = canned_response(prompt)
+        # CrewAI's ReAct scaffolding expects a Final Answer marker
+        if "Final Answer:" in prompt:
+            text = "Thought: Do I need to use a tool? No\nFinal Answer: " + text
+        return text
+
+    def cached_prefix(self, model, tokens):
+        """Tokens of this prompt already in a cache slot; the prompt then takes that slot"""
+        with self._lock:
+            slots = self._prompt_cache.setdefault(model, [])
+            best, best_slot = 0, None
+            for slot in slots:
+                shared = 0
+                for a, b in zip(slot, tokens):
+                    if a != b:
+                        break
+                    shared += 1
+                if shared > best:
+                    best, best_slot = shared, slot
+            if best_slot is not None:
+                slots.remove(best_slot)
+            elif len(slots) >= self.cache_slots:
+                slots.pop(0)
+            slots.append(tokens)
+        return best
+
+    def start(self):
+        """Serve from a background thread; returns self for chaining"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def _tokens(text):
+    """Split text into ~4 character pieces, roughly one model token each"""
+    return [text[i:i + 4] for i in range(0, len(text), 4)] or [""]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, payload):
+        line = (json.dumps(payload) + "\n").encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.server.fail_with:
+            self._send_json({"error": "stub failure"}, self.server.fail_with)
+        elif self.path.startswith("/api/tags"):
+            self._send_json({"models": [{"name": f"{m}:latest", "model": f"{m}:latest"}
+                                        for m in self.server.models]})
+        elif self.path.startswith("/api/version"):
+            self._send_json({"version": "0.0.0-stub"})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.startswith("/api/generate"):
+            self._send_json({"error": "not found"}, 404)
+            return
+        if self.server.fail_with:
+            self._send_json({"error": "stub failure"}, self.server.fail_with)
+            return
+
+        server = self.server
+        if "prompt" not in request:
+            # Ollama loads the model and returns at once when there is no prompt
+            self._send_json({"model": request.get("model"), "response": "", "done": True,
+                             "done_reason": "load", "load_duration": 0})
+            return
+        with server._lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            self._generate(request)
+        finally:
+            with server._lock:
+                server.in_flight -= 1
+
+    def _generate(self, request):
+        server = self.server
+        prompt = request.get("prompt", "")
+        if request.get("system"):
+            prompt = request["system"] + "\n" + prompt
+        text = server.respond_to(prompt)
+        for stop in (request.get("options") or {}).get("stop") or ():
+            if stop in text:
+                text = text[:text.index(stop)]
+        tokens = _tokens(text)
+        started = time.perf_counter()
+        delay = 1.0 / server.rate if server.rate else 0.0
+        prompt_tokens = _tokens(prompt)
+        evaluated = max(1, len(prompt_tokens) - server.cached_prefix(request.get("model"), prompt_tokens))
+        prefill = evaluated / server.prefill_rate if server.prefill_rate else 0.0
+        final = {
+            "model": request.get("model"),
+            "response": "",
+            "done": True,
+            "prompt_eval_count": evaluated,
+            "prompt_eval_duration": int(prefill * 1e9),
+            "eval_count": len(tokens),
+        }
+
+        if not request.get("stream", True):
+            time.sleep(server.latency + prefill + delay * len(tokens))
+            final["response"] = "".join(tokens)
+            final["eval_duration"] = int((delay * len(tokens)) * 1e9)
+            final["total_duration"] = int((time.perf_counter() - started) * 1e9)
+            self._send_json(final)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(server.latency + prefill)
+        eval_start = time.perf_counter()
+        try:
+            for token in tokens:
+                self._chunk({"model": request.get("model"), "response": token, "done": False})
+                if delay:
+                    time.sleep(delay)
+            final["eval_duration"] = int((time.perf_counter() - eval_start) * 1e9)
+            final["total_duration"] = int((time.perf_counter() - started) * 1e9)
+            self._chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client cancelled the stream
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to first token")
+    parser.add_argument("--rate", type=float, default=0.0, help="tokens per second (0 = instant)")
+    parser.add_argument("--prefill-rate", type=float, default=0.0,
+                        help="uncached prompt tokens per second (0 = instant)")
+    parser.add_argument("--responses", help="JSONL of recorded {match, response} pairs")
+    args = parser.parse_args()
+
+    recorded = load_recorded(args.responses) if args.responses else None
+    server = StubOllamaServer(args.host, args.port, args.latency, args.rate, recorded,
+                              prefill_rate=args.prefill_rate)
+    print(f"Stub Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,14 @@
 """
 CodeCrew CLI - Simple command-line interface for code generation
-Run: python cli.py
+Run: python cli.py [--fast | --verified | --combined | --speculative [--candidates 3]]
+Batch: python cli.py --batch queries.jsonl [--out results.jsonl] [--concurrency 4] [--resume]
+Add --no-cache to bypass the LLM response cache, --no-stream to hide tokens as they arrive.
+Add --metrics metrics.jsonl / --trace trace.json to export per-stage timings.
+Add --backend crewai to run each stage through a CrewAI Crew instead of one direct LLM call.
+Add --cascade llama3.2 to try every stage on a small model first, escalating on invalid output.
+Add --deadline 60 to fall back to a cheaper mode when the chosen one is estimated to take longer.
+Every run is kept in the run history; add --save result.json to also write it to a file.
+History: python cli.py --history [--limit 20] [--status VERIFIED_PASSED] [--search text] | --show RUN_ID
 """
 
 import sys
@@ -10,8 +18,84 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.main import CodeCrewOrchestrator
+from src.config import OLLAMA_WARMUP
+from src.llm.runtime import get_runtime
+from src.events import TOKEN, ITERATION, ERROR
 import json
 
+def get_option(name, default=None):
+    """Value following a --flag on the command line, or default"""
+    if name in sys.argv:
+        idx = sys.argv.index(name)
+        if idx + 1 < len(sys.argv):
+            return sys.argv[idx + 1]
+    return default
+
+class StreamPrinter:
+    """Event subscriber echoing tokens as they arrive, with a header whenever the stage changes"""
+    
+    kinds = (TOKEN, ITERATION, ERROR)
+    
+    def __init__(self):
+        self.stage = None
+    
+    def __call__(self, event):
+        if event.kind == ITERATION:
+            print(f"\n\n=== Iteration {event.iteration} ===", flush=True)
+            self.stage = None
+        elif event.kind == ERROR:
+            print(f"\n[{event.stage or 'run'}] {event.data['error']}", flush=True)
+        else:
+            if event.stage != self.stage:
+                print(f"\n\n--- {event.stage} ---\n", flush=True)
+                self.stage = event.stage
+            print(event.data["text"], end="", flush=True)
+
+def run_batch_mode(input_path, default_mode):
+    """Run a JSONL file of queries and stream results to a JSONL file"""
+    from src.batch import run_batch
+    
+    output_path = get_option("--out", "results.jsonl")
+    concurrency = int(get_option("--concurrency", "0")) or None
+    resume = "--resume" in sys.argv
+    
+    print(f"[BATCH MODE] {input_path} -> {output_path} (default mode: {default_mode})")
+    if OLLAMA_WARMUP:
+        get_runtime().warm_up()
+    
+    def report(record, done, total):
+        print(f"[{done}/{total}] {record['id']}: {record.get('status', 'Unknown')}")
+    
+    written = run_batch(input_path, output_path, concurrency=concurrency,
+                        default_mode=default_mode, resume=resume,
+                        max_iterations=2, use_cache=False if "--no-cache" in sys.argv else None,
+                        on_result=report)
+    print(f"\n[{written} results written to {output_path}]")
+
+def run_history_mode():
+    """List past runs, or print one of them in full"""
+    from src.tools.run_history import get_run_history
+    
+    history = get_run_history()
+    run_id = get_option("--show")
+    if run_id:
+        run = history.get(int(run_id))
+        if run is None:
+            print(f"No run #{run_id}")
+            return
+        print(json.dumps(run, indent=2))
+        return
+    
+    runs = history.history(limit=int(get_option("--limit", "20")), status=get_option("--status"),
+                           mode=get_option("--mode"), since=get_option("--since"),
+                           text=get_option("--search"))
+    stats = history.stats()
+    print(f"[HISTORY] {stats['runs']} runs, {stats['code_blobs']} distinct code versions")
+    for run in runs:
+        duration = f"{run['duration']:.1f}s" if run['duration'] is not None else "-"
+        print(f"#{run['id']:<6} {run['created']}  {run['mode'] or '-':<11} {run['status'] or '-':<20}"
+              f" {duration:>8}  {run['query'][:60]}")
+
 def main():
     print("=" * 60)
     print("🤖 CodeCrew - Multi-Agent Code Generation")
@@ -20,14 +104,36 @@ def main():
     # Check for modes
     fast_mode = "--fast" in sys.argv or "-f" in sys.argv
     verified_mode = "--verified" in sys.argv or "-v" in sys.argv
+    combined_mode = "--combined" in sys.argv or "-c" in sys.argv
+    speculative_mode = "--speculative" in sys.argv or "-s" in sys.argv
+    
+    if "--history" in sys.argv or "--show" in sys.argv:
+        run_history_mode()
+        return
+    
+    batch_file = get_option("--batch")
+    if batch_file:
+        default_mode = ("fast" if fast_mode else "verified" if verified_mode
+                        else "combined" if combined_mode
+                        else "speculative" if speculative_mode else "standard")
+        run_batch_mode(batch_file, default_mode)
+        return
     
     if fast_mode:
         print("[FAST MODE] Developer only, no verification")
     elif verified_mode:
         print("[VERIFIED MODE] With automated testing")
+    elif combined_mode:
+        print("[COMBINED MODE] QA → Reviewer alongside automated testing")
+    elif speculative_mode:
+        print("[SPECULATIVE MODE] Concurrent candidates, first to pass the tests wins")
     else:
         print("[STANDARD MODE] Developer → QA → Reviewer")
     
+    # Load the models while the user types
+    if OLLAMA_WARMUP:
+        get_runtime().warm_up()
+    
     # Get user input
     query = input("\nDescribe what code you need:\n> ")
     
@@ -35,42 +141,87 @@ def main():
         query = "Write a Python function that calculates the factorial of a number with proper error handling"
         print(f"Using default: {query}")
     
-    mode_label = "[FAST]" if fast_mode else "[VERIFIED]" if verified_mode else ""
+    mode_label = ("[FAST]" if fast_mode else "[VERIFIED]" if verified_mode
+                  else "[COMBINED]" if combined_mode
+                  else "[SPECULATIVE]" if speculative_mode else "")
     print("\n" + "=" * 60)
     print(f"Processing... {mode_label}")
     print("=" * 60 + "\n")
     
     # Create orchestrator and process
-    orchestrator = CodeCrewOrchestrator(verbose=not fast_mode)
+    use_cache = False if "--no-cache" in sys.argv else None
+    orchestrator = CodeCrewOrchestrator(verbose=not fast_mode, use_cache=use_cache,
+                                        backend=get_option("--backend"))
+    printer = None
+    if "--no-stream" not in sys.argv:
+        printer = orchestrator.events.subscribe(StreamPrinter(), kinds=StreamPrinter.kinds)
+    orchestrator.metrics_path = get_option("--metrics", orchestrator.metrics_path)
+    orchestrator.trace_path = get_option("--trace", orchestrator.trace_path)
     orchestrator.max_iterations = 2
+    orchestrator.cascade_model = get_option("--cascade", orchestrator.cascade_model)
+    if "--cascade" in sys.argv:
+        orchestrator.warm_up()
+    orchestrator.deadline = float(get_option("--deadline", "0")) or orchestrator.deadline
     
     try:
-        if fast_mode:
-            result = orchestrator.process_request_fast(query)
-        elif verified_mode:
-            result = orchestrator.process_request_verified(query)
+        if speculative_mode:
+            candidates = int(get_option("--candidates", "0")) or None
+            result = orchestrator.process(query, "speculative", candidates=candidates)
         else:
-            result = orchestrator.process_request(query)
+            mode = ("fast" if fast_mode else "verified" if verified_mode
+                    else "combined" if combined_mode else "standard")
+            result = orchestrator.process(query, mode)
+        if result.get("downgraded_from"):
+            print(f"\n[DEADLINE] Ran in {result['metadata']['mode']} mode instead of {result['downgraded_from']}")
         
+        if printer:
+            printer.close()  # Let the last streamed tokens print before the summary
         print("\n" + "=" * 60)
         print("✅ RESULT")
         print("=" * 60)
         print(f"\nStatus: {result.get('status', 'Unknown')}")
         
+        gate = result.get('static_check')
+        if gate:
+            verdict = "passed" if gate['ok'] else "FAILED"
+            print(f"Static checks: {verdict} in {gate['duration']}s"
+                  f"{' after ' + str(gate['attempts']) + ' attempts' if gate.get('attempts', 1) > 1 else ''}")
+            for problem in gate['errors'] + gate['warnings']:
+                print(f"  - {problem}")
+        
+        confidence = result.get('confidence')
+        if confidence:
+            print(f"Confidence: {confidence['score']} (threshold {confidence['threshold']}),"
+                  f" review {confidence['review']}")
+        
+        metadata = result.get('metadata', {})
+        print(f"Duration: {metadata.get('duration')}s")
+        for stage in metadata.get('stages', []):
+            print(f"  {stage['stage']:<10} iter {stage['iteration']}  {stage['wall_time']:>8.2f}s"
+                  f"  ttft {stage['ttft'] if stage['ttft'] is not None else '-'}s"
+                  f"  {stage['prompt_tokens']}+{stage['completion_tokens']} tok"
+                  f"  {stage['tokens_per_sec'] or '-'} tok/s"
+                  f"{'  [cache]' if stage['cache_hit'] else ''}")
+        
         # Show test results if in verified mode
-        if verified_mode and result.get('results'):
+        if (verified_mode or combined_mode or speculative_mode) and result.get('results'):
             print("\n--- Test Results ---\n")
             print(result.get('results', 'No test results'))
         
         print("\n--- Generated Code ---\n")
         print(result.get('code', 'No code generated'))
         
-        # Save result
-        with open("result.json", "w") as f:
-            json.dump(result, f, indent=2)
-        print("\n[Result saved to result.json]")
+        if result.get('run_id'):
+            print(f"\n[Run #{result['run_id']} saved to history - python cli.py --show {result['run_id']}]")
+        save_path = get_option("--save")
+        if save_path:
+            with open(save_path, "w") as f:
+                json.dump(result, f, indent=2)
+            print(f"[Result saved to {save_path}]")
         
     except Exception as e:
+        if printer:
+            printer.close()
         print(f"\n❌ Error: {e}")
 
 if __name__ == "__main__":
@@ -5,11 +5,14 @@ from .qa_debugger import create_qa_agent
 from .reviewer import create_reviewer_agent
 from .usecase_agent import create_usecase_agent
 from .testing_agent import create_testing_agent
+from .registry import get_agent, clear_agents
 
 __all__ = [
     "create_developer_agent",
     "create_qa_agent",
     "create_reviewer_agent",
     "create_usecase_agent",
-    "create_testing_agent"
+    "create_testing_agent",
+    "get_agent",
+    "clear_agents"
 ]
@@ -1,17 +1,14 @@
 """
 Developer Agent - Code writer and generator
 """
-from crewai import Agent
-from langchain.llms import Ollama
-from src.config import LLM_MODEL, OLLAMA_BASE_URL
 
-def create_developer_agent(verbose: bool = False):
+def create_developer_agent(verbose: bool = False, llm=None):
     """Create and return the Developer agent for code generation"""
     
-    llm = Ollama(
-        model=LLM_MODEL,
-        base_url=OLLAMA_BASE_URL,
-    )
+    from src.engine import Agent
+    from src.llm.runtime import llm_for
+
+    llm = llm or llm_for("developer")
     
     agent = Agent(
         role="Senior Python Developer",
@@ -1,16 +1,13 @@
 """
 QA Engineer/Debugger Agent - Error handling and debugging
 """
-from crewai import Agent
-from langchain.llms import Ollama
-from src.config import LLM_MODEL, OLLAMA_BASE_URL
 
-def create_qa_agent(verbose: bool = False):
+def create_qa_agent(verbose: bool = False, llm=None):
     """Create and return the QA Engineer agent"""
-    llm = Ollama(
-        model=LLM_MODEL,
-        base_url=OLLAMA_BASE_URL,
-    )
+    from src.engine import Agent
+    from src.llm.runtime import llm_for
+
+    llm = llm or llm_for("qa")
     
     agent = Agent(
         role="QA Engineer",
@@ -0,0 +1,46 @@
+"""Agent Registry - Builds each agent once per process and hands out the same instance
+
+Agents and tasks are plain records (src.engine.Agent, Task) around a plain
+OllamaLLM; crewai and langchain load only if a stage runs on the crewai backend.
+"""
+import threading
+
+from src.config import AGENT_MODELS, LLM_MODEL, OLLAMA_BASE_URL
+from src.llm.runtime import llm_for
+from .developer import create_developer_agent
+from .qa_debugger import create_qa_agent
+from .reviewer import create_reviewer_agent
+from .usecase_agent import create_usecase_agent
+from .testing_agent import create_testing_agent
+
+
+AGENT_FACTORIES = {
+    "developer": create_developer_agent,
+    "qa": create_qa_agent,
+    "reviewer": create_reviewer_agent,
+    "usecase": create_usecase_agent,
+    "testing": create_testing_agent,
+}
+
+_agents = {}
+_lock = threading.Lock()
+
+
+def get_agent(kind, verbose=False, model=None):
+    """Shared agent of the given kind, keyed by model, server and verbosity.
+
+    model defaults to the agent's entry in AGENT_MODELS, then LLM_MODEL.
+    """
+    model = model or AGENT_MODELS.get(kind) or LLM_MODEL
+    key = (kind, model, OLLAMA_BASE_URL, bool(verbose))
+    with _lock:
+        agent = _agents.get(key)
+        if agent is None:
+            agent = _agents[key] = AGENT_FACTORIES[kind](verbose=verbose, llm=llm_for(kind, model))
+        return agent
+
+
+def clear_agents():
+    """Forget cached agents (e.g. after changing prompts at runtime)"""
+    with _lock:
+        _agents.clear()
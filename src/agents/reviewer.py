@@ -1,16 +1,13 @@
 """
 Reviewer/Validator Agent - Logic validation and code review
 """
-from crewai import Agent
-from langchain.llms import Ollama
-from src.config import LLM_MODEL, OLLAMA_BASE_URL
 
-def create_reviewer_agent(verbose: bool = False):
+def create_reviewer_agent(verbose: bool = False, llm=None):
     """Create and return the Reviewer agent"""
-    llm = Ollama(
-        model=LLM_MODEL,
-        base_url=OLLAMA_BASE_URL,
-    )
+    from src.engine import Agent
+    from src.llm.runtime import llm_for
+
+    llm = llm or llm_for("reviewer")
     
     agent = Agent(
         role="Code Reviewer",
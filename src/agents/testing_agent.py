@@ -1,11 +1,11 @@
 """Testing Agent - Runs the tests"""
-from crewai import Agent
-from langchain.llms import Ollama
-from src.config import LLM_MODEL, OLLAMA_BASE_URL
 
 
-def create_testing_agent(verbose=False):
-    llm = Ollama(model=LLM_MODEL, base_url=OLLAMA_BASE_URL)
+def create_testing_agent(verbose=False, llm=None):
+    from src.engine import Agent
+    from src.llm.runtime import llm_for
+
+    llm = llm or llm_for("testing")
     
     return Agent(
         role="Tester",
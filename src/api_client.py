@@ -0,0 +1,81 @@
+"""API Client - Talks to the job server (src.server) over HTTP"""
+import time
+
+import requests
+
+from src.config import CODECREW_API_URL
+
+
+class ServerBusy(Exception):
+    """The server's queue is full; retry after `retry_after` seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"server busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class CodeCrewClient:
+    """Submit jobs, follow their progress and fetch results"""
+
+    def __init__(self, base_url=None, timeout=10):
+        self.base_url = (base_url or CODECREW_API_URL).rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _get(self, path, **params):
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def health(self):
+        return self._get("/health")
+
+    def submit(self, query, mode="standard", max_iterations=None, user=None, deadline=None):
+        """Queue a request and return its job description; raises ServerBusy on 429"""
+        response = self.session.post(
+            f"{self.base_url}/jobs",
+            json={"query": query, "mode": mode, "max_iterations": max_iterations,
+                  "user": user, "deadline": deadline},
+            timeout=self.timeout,
+        )
+        if response.status_code == 429:
+            raise ServerBusy(int(response.headers.get("Retry-After", "5")))
+        response.raise_for_status()
+        return response.json()
+
+    def status(self, job_id):
+        return self._get(f"/jobs/{job_id}")
+
+    def result(self, job_id):
+        """The finished result, or None while the job is still queued or running"""
+        response = self.session.get(f"{self.base_url}/jobs/{job_id}/result", timeout=self.timeout)
+        if response.status_code == 202:
+            return None
+        if response.status_code == 409:
+            job = response.json()
+            raise RuntimeError(f"job {job_id} {job['status']}: {job.get('error') or ''}".strip())
+        response.raise_for_status()
+        return response.json()
+
+    def cancel(self, job_id):
+        response = self.session.post(f"{self.base_url}/jobs/{job_id}/cancel", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def wait(self, job_id, poll=0.5, on_status=None):
+        """Poll until the job finishes; on_status(job) sees every intermediate status"""
+        while True:
+            job = self.status(job_id)
+            if on_status:
+                on_status(job)
+            if job["status"] not in ("queued", "running"):
+                return self.result(job_id)
+            time.sleep(poll)
+
+    def history(self, limit=20, status=None, mode=None, search=None):
+        params = {k: v for k, v in {"limit": limit, "status": status, "mode": mode,
+                                    "search": search}.items() if v is not None}
+        return self._get("/history", **params)
+
+    def run(self, run_id):
+        return self._get(f"/runs/{run_id}")
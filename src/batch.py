@@ -0,0 +1,111 @@
+"""Batch runner - pushes a JSONL file of queries through the pipeline concurrently"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.main import CodeCrewOrchestrator
+from src.config import BATCH_CONCURRENCY
+
+
+MODES = ("fast", "standard", "verified", "combined", "speculative")
+
+
+def load_requests(path, default_mode="standard"):
+    """Read queries from a JSONL file.
+
+    Each line needs a "query" (or "prompt"/"body") and may carry an "id"
+    (or "request_id") and a "mode" of fast|standard|verified|combined|speculative.
+    """
+    requests = []
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"query": item}
+            query = item.get("query") or item.get("prompt") or item.get("body")
+            if not query:
+                raise ValueError(f"{path}:{lineno}: no query")
+            mode = item.get("mode") or default_mode
+            if mode not in MODES:
+                raise ValueError(f"{path}:{lineno}: unknown mode {mode!r}")
+            requests.append({
+                "id": str(item.get("id") or item.get("request_id") or lineno),
+                "query": query,
+                "mode": mode,
+            })
+    return requests
+
+
+def load_finished_ids(path):
+    """Ids already written successfully to an output file (for --resume)"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partially written line from an interrupted run
+            if record.get("status") != "error":
+                done.add(str(record.get("id")))
+    return done
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def run_one(orchestrator, request):
+    """Run a single request in its mode, returning a JSON-serialisable record"""
+    try:
+        result = orchestrator.process(request["query"], request["mode"])
+    except Exception as e:
+        return {"id": request["id"], "query": request["query"], "mode": request["mode"],
+                "status": "error", "error": str(e)}
+    return {"id": request["id"], "mode": request["mode"], **result}
+
+
+def run_batch(input_path, output_path, concurrency=None, default_mode="standard",
+              resume=False, max_iterations=None, use_cache=None, on_result=None):
+    """Run every request in input_path and append one JSONL line per result.
+
+    Results are written as soon as each request finishes, so the output file
+    is usable (and resumable) even if the batch is interrupted.
+    """
+    requests = load_requests(input_path, default_mode)
+    if resume:
+        done = load_finished_ids(output_path)
+        requests = [r for r in requests if r["id"] not in done]
+
+    local = threading.local()
+
+    def worker(request):
+        # One orchestrator per worker thread, created on first use
+        if not hasattr(local, "orchestrator"):
+            local.orchestrator = CodeCrewOrchestrator(verbose=False, use_cache=use_cache)
+            local.orchestrator.priority = "batch"  # Interactive requests go first, whatever the mode
+            if max_iterations:
+                local.orchestrator.max_iterations = max_iterations
+        return run_one(local.orchestrator, request)
+
+    written = 0
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+        if out.tell() and not _ends_with_newline(output_path):
+            out.write("\n")  # Don't glue onto a line cut off by an interrupted run
+        with ThreadPoolExecutor(max_workers=concurrency or BATCH_CONCURRENCY) as pool:
+            futures = [pool.submit(worker, r) for r in requests]
+            for future in as_completed(futures):
+                record = future.result()
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                written += 1
+                if on_result:
+                    on_result(record, written, len(requests))
+    return written
@@ -0,0 +1,53 @@
+"""Cascade - checks that decide whether a small model's answer is good enough or the stage escalates"""
+import ast
+import re
+
+from src.confidence import qa_bug_count
+from src.tools.code_executor import parse_scenarios
+from src.tools.code_fence import extract_code
+
+
+_DECISION = re.compile(r"Decision:\W*(APPROVED|NEEDS_REVISION)", re.IGNORECASE)
+
+
+def code_parses(output):
+    """Developer: the extracted code is non-empty, valid Python"""
+    code = extract_code(output).strip()
+    if not code:
+        return False
+    try:
+        ast.parse(code)
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+
+def qa_reported(output):
+    """QA: the feedback states a bug count"""
+    return qa_bug_count(output) is not None
+
+
+def review_approved(output):
+    """Reviewer: an explicit APPROVED; NEEDS_REVISION or no decision goes to the large model"""
+    match = _DECISION.search(output)
+    return bool(match) and match.group(1).upper() == "APPROVED"
+
+
+def scenarios_valid(output):
+    """Use case: the scenarios parse as a non-empty JSON list"""
+    return bool(parse_scenarios(output))
+
+
+def tests_reported(output):
+    """Testing agent: the report ends in a STATUS line"""
+    return "STATUS:" in output
+
+
+# Agent kind -> check applied to its small-model output
+ACCEPT = {
+    "developer": code_parses,
+    "qa": qa_reported,
+    "reviewer": review_approved,
+    "usecase": scenarios_valid,
+    "testing": tests_reported,
+}
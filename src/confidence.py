@@ -0,0 +1,55 @@
+"""Confidence - scores cheap evidence that generated code is correct, to decide whether a review is needed"""
+import re
+
+from src.config import VALIDATION_THRESHOLD
+
+
+# How much each signal contributes; a full score needs all three
+WEIGHTS = {"static": 0.25, "qa": 0.35, "execution": 0.4}
+
+_BUG_COUNT = re.compile(r"BUGS FOUND:\s*(\d+|none|no)\b", re.IGNORECASE)
+_NO_BUGS = re.compile(r"\bno (?:bugs|issues|errors|problems)(?: were)? (?:found|detected)\b", re.IGNORECASE)
+
+
+def qa_bug_count(feedback):
+    """Bug count from the QA agent's "BUGS FOUND: N" line, or None if it gave none"""
+    match = _BUG_COUNT.search(feedback or "")
+    if match:
+        count = match.group(1).lower()
+        return 0 if count in ("none", "no") else int(count)
+    if _NO_BUGS.search(feedback or ""):
+        return 0
+    return None
+
+
+def score_confidence(gate, feedback, execution, threshold=None):
+    """Combine the static gate, QA verdict and a sandboxed run into one score.
+
+    Each signal is 1.0 (clean), 0.0 (problem found) or 0.5 (inconclusive:
+    QA gave no bug count, or the program stopped waiting for input).
+    Returns {"score", "threshold", "signals", "confident"}.
+    """
+    threshold = VALIDATION_THRESHOLD if threshold is None else threshold
+
+    bugs = qa_bug_count(feedback)
+    if execution["passed"]:
+        ran = 1.0
+    elif execution.get("error") == "EOFError":
+        ran = 0.5
+    else:
+        ran = 0.0
+
+    signals = {
+        "static": 1.0 if gate["ok"] else 0.0,
+        "qa": 0.5 if bugs is None else float(bugs == 0),
+        "execution": ran,
+    }
+    score = round(sum(WEIGHTS[name] * value for name, value in signals.items()), 3)
+    return {
+        "score": score,
+        "threshold": threshold,
+        "signals": signals,
+        "qa_bugs": bugs,
+        "execution": execution.get("got"),
+        "confident": score >= threshold,
+    }
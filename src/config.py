@@ -2,20 +2,120 @@
 CodeCrew Configuration - Minimal, Clean Settings
 """
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+
+def _load_env():
+    """Load the nearest .env above this package; dotenv is only imported if one exists"""
+    folder = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(folder, ".env")
+        if os.path.isfile(path):
+            from dotenv import load_dotenv
+            load_dotenv(path)
+            return
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            return
+        folder = parent
+
+
+_load_env()
 
 # LLM Configuration
 # Using Ollama
 LLM_MODEL = os.getenv("LLM_MODEL", "llama3.2")  # llama3.2 is faster, llama3.1 is more accurate
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")  # Comma-separate several servers to balance over them
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "8"))  # Keep-alive connections per server
+OLLAMA_TIMEOUT = int(os.getenv("OLLAMA_TIMEOUT", "600"))  # Seconds per request
+LLM_MAX_PARALLEL = int(os.getenv("LLM_MAX_PARALLEL", "2"))  # In-flight LLM calls per server; match OLLAMA_NUM_PARALLEL
+OLLAMA_HEALTH_INTERVAL = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "10"))  # Seconds between probes of each server (0 = off)
+OLLAMA_EJECT_AFTER = int(os.getenv("OLLAMA_EJECT_AFTER", "3"))  # Failed calls in a row that take a server out of rotation
+OLLAMA_EJECT_SECONDS = float(os.getenv("OLLAMA_EJECT_SECONDS", "30"))  # How long an ejected server sits out
+# LLM calls take a server's slots by class: interactive (fast) before standard before batch (verified)
+LLM_CLASS_SLOTS = {  # Most slots per server a class may hold at once
+    "interactive": int(os.getenv("INTERACTIVE_SLOTS", str(LLM_MAX_PARALLEL))),
+    "standard": int(os.getenv("STANDARD_SLOTS", str(LLM_MAX_PARALLEL))),
+    "batch": int(os.getenv("BATCH_SLOTS", str(max(1, LLM_MAX_PARALLEL // 2)))),
+}
+LLM_INTERACTIVE_RESERVED = int(os.getenv("INTERACTIVE_RESERVED", "1"))  # Slots per server kept for interactive calls
+LLM_ACTIVE_WINDOW = float(os.getenv("LLM_ACTIVE_WINDOW", "10"))  # Seconds a class stays active (caps and reserve hold) after its last call
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "0")) or None  # Seconds; slower modes are downgraded (0 = none)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # How long a model stays loaded after a call (-1 = always)
+OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "1") != "0"  # Preload the configured models when the CLI or server starts
 TEMPERATURE = 0.3  # Deterministic code generation
 MAX_TOKENS = 2048
+CONTEXT_WINDOW = int(os.getenv("CONTEXT_WINDOW", "4096"))  # Tokens; prompts are budgeted to fit
+PROMPT_FEEDBACK_LINES = int(os.getenv("PROMPT_FEEDBACK_LINES", "15"))  # Feedback lines carried forward
+PROMPT_SHARED_PREFIX = os.getenv("PROMPT_SHARED_PREFIX", "1") != "0"  # Requirement and code first, for server prompt caching
+
+# Model Routing: per-agent models (empty = LLM_MODEL), e.g. DEVELOPER_MODEL=llama3.1 REVIEWER_MODEL=llama3.2
+AGENT_MODELS = {
+    "developer": os.getenv("DEVELOPER_MODEL", ""),
+    "qa": os.getenv("QA_MODEL", ""),
+    "reviewer": os.getenv("REVIEWER_MODEL", ""),
+    "usecase": os.getenv("USECASE_MODEL", ""),
+    "testing": os.getenv("TESTING_MODEL", ""),
+}
+# Output budget (num_predict) and temperature per agent; num_ctx is sized per call from these and the prompt
+AGENT_MAX_TOKENS = {"developer": MAX_TOKENS, "qa": MAX_TOKENS, "reviewer": 512, "usecase": 1024, "testing": 512}
+AGENT_TEMPERATURE = {"developer": TEMPERATURE, "qa": 0.1, "reviewer": 0.1, "usecase": 0.2, "testing": 0.0}
+CASCADE_MODEL = os.getenv("CASCADE_MODEL", "")  # If set, stages try this small model first and escalate on invalid output
+
+# Early Stop (set EARLY_STOP=0 to disable): code generation ends at the closing fence of the python block
+EARLY_STOP_ENABLED = os.getenv("EARLY_STOP", "1") != "0"
+
+# Execution Backend: "direct" makes one LLM call per stage, "crewai" runs a Crew
+EXECUTION_BACKEND = os.getenv("EXECUTION_BACKEND", "direct")
 
 # Workflow Settings
 MAX_ITERATIONS = 1  # 1 for speed, 2-3 for quality
-VALIDATION_THRESHOLD = 0.85
+VALIDATION_THRESHOLD = float(os.getenv("VALIDATION_THRESHOLD", "0.85"))  # Confidence needed to skip the review
+REVIEW_LIGHT_MODEL = os.getenv("REVIEW_LIGHT_MODEL", "")  # If set, confident code is reviewed by this model instead of skipped
+
+# Test Executor Settings (verified mode runs scenarios locally, not via LLM)
+TEST_TIMEOUT = int(os.getenv("TEST_TIMEOUT", "5"))  # Wall-clock seconds per scenario
+TEST_MEMORY_MB = int(os.getenv("TEST_MEMORY_MB", "256"))  # Address space limit per scenario
+TEST_WORKERS = int(os.getenv("TEST_WORKERS", str(os.cpu_count() or 2)))
+TEST_REGRESSION_SAMPLE = int(os.getenv("TEST_REGRESSION_SAMPLE", "2"))  # Passing scenarios re-run per repair
+
+# LLM Response Cache (set LLM_CACHE=0 to bypass)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".codecrew_cache")
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "256"))
+LLM_CACHE_MAX_AGE_DAYS = int(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30"))
+
+# Near-Duplicate Reuse (set QUERY_INDEX=0 to disable); similarity is estimated Jaccard of character 3-grams and word pairs
+QUERY_INDEX_ENABLED = os.getenv("QUERY_INDEX", "1") != "0"
+QUERY_REUSE_THRESHOLD = float(os.getenv("QUERY_REUSE_THRESHOLD", "0.9"))  # Reuse if it also passes this query's tests
+QUERY_WARM_START_THRESHOLD = float(os.getenv("QUERY_WARM_START_THRESHOLD", "0.6"))  # Containment to draft from it
+
+# Run History (set RUN_HISTORY=0 to disable)
+RUN_HISTORY_ENABLED = os.getenv("RUN_HISTORY", "1") != "0"
+RUN_HISTORY_DB = os.getenv("RUN_HISTORY_DB", ".codecrew_history.sqlite")
+
+# Metrics Export (empty = off). METRICS_TRACE may be a file or a directory
+METRICS_JSONL = os.getenv("METRICS_JSONL", "")
+METRICS_TRACE = os.getenv("METRICS_TRACE", "")
+
+# Static Pre-Validation Gate
+STATIC_GATE_RETRIES = int(os.getenv("STATIC_GATE_RETRIES", "2"))  # Regenerations on failed checks
+STATIC_ALLOWED_MODULES = os.getenv("STATIC_ALLOWED_MODULES", "")  # Extra importable modules, comma separated
+
+# Speculative Mode: concurrent candidates, each needs a free Ollama slot (LLM_MAX_PARALLEL)
+SPECULATIVE_CANDIDATES = int(os.getenv("SPECULATIVE_CANDIDATES", "3"))
+SPECULATIVE_TEMPERATURE_STEP = float(os.getenv("SPECULATIVE_TEMPERATURE_STEP", "0.2"))  # Added per extra candidate
+
+# Job Server (python -m src.server); app.py talks to it at CODECREW_API_URL
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8600"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", str(LLM_MAX_PARALLEL)))  # Concurrent requests
+SERVER_QUEUE_SIZE = int(os.getenv("SERVER_QUEUE_SIZE", "32"))  # Waiting jobs before submit gets a 429
+SERVER_JOB_RETENTION = int(os.getenv("SERVER_JOB_RETENTION", "1000"))  # Finished jobs kept in memory
+SERVER_MAX_ITERATIONS = int(os.getenv("SERVER_MAX_ITERATIONS", "5"))  # Highest max_iterations a job may ask for
+CODECREW_API_URL = os.getenv("CODECREW_API_URL", f"http://{SERVER_HOST}:{SERVER_PORT}")
+
+# Batch Settings
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))  # Match OLLAMA_NUM_PARALLEL on the server
 
 # Agent Settings
 DEVELOPER_AGENT_CONFIG = {
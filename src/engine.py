@@ -0,0 +1,104 @@
+"""Direct Engine - runs a single-agent stage as one LLM call, without a Crew
+
+Agents and tasks are plain records; crewai (and langchain) are imported only
+when a stage runs on the crewai backend (run_crewai).
+"""
+from dataclasses import dataclass, replace
+from typing import Any
+
+from src.config import PROMPT_SHARED_PREFIX
+from src.prompting import PROMPT_OVERHEAD, STAGE_MARKER, dedupe_lines, fit_prompt, prompt_budget
+
+
+@dataclass
+class Agent:
+    """What a stage's agent is: its framing and the LLM it calls"""
+    role: str
+    goal: str
+    backstory: str
+    llm: Any
+    verbose: bool = False
+
+
+@dataclass
+class Task:
+    """What a stage asks its agent to do"""
+    description: str
+    expected_output: str
+    agent: Agent
+
+
+PROMPT_TEMPLATE = """You are {role}.
+{backstory}
+
+Your goal: {goal}
+
+{description}
+
+Expected output: {expected_output}
+"""
+
+# For tasks built with stage_prompt(): the shared prefix goes first, before anything agent-specific
+SHARED_PREFIX_TEMPLATE = """{prefix}
+
+{marker}
+You are {role}.
+{backstory}
+
+Your goal: {goal}
+
+{description}
+
+Expected output: {expected_output}
+"""
+
+
+def render_prompt(agent, task):
+    """Flatten an agent definition and its task into a single prompt.
+
+    Agent goals and task descriptions repeat several instructions; the
+    duplicates are dropped before the prompt is fitted to the agent's budget,
+    the only place a direct prompt is fitted.
+    A task's shared prefix (see stage_prompt) is moved ahead of the agent
+    framing, so consecutive stages on the same code start identically.
+    """
+    description = task.description.strip()
+    prefix, marker, instructions = description.rpartition(STAGE_MARKER)
+    fields = dict(role=agent.role, backstory=agent.backstory, goal=agent.goal,
+                  expected_output=task.expected_output)
+    if marker and PROMPT_SHARED_PREFIX:
+        prompt = SHARED_PREFIX_TEMPLATE.format(prefix=prefix.rstrip(), marker=marker,
+                                               description=instructions.strip(), **fields)
+    else:
+        prompt = PROMPT_TEMPLATE.format(description=description, **fields)
+    budget = prompt_budget(getattr(agent.llm, "num_predict", None))
+    return fit_prompt(dedupe_lines(prompt), budget, label=f"{agent.role} prompt")
+
+
+def run_direct(agent, task):
+    """Call the agent's LLM once with the rendered prompt.
+
+    CrewAI wraps the same call in a ReAct executor with tool scaffolding and
+    may take several turns; single-agent stages without tools don't need it.
+    """
+    return agent.llm.predict(render_prompt(agent, task)).strip()
+
+
+def run_crewai(agent, task):
+    """Run the stage through a one-agent CrewAI Crew (the crewai backend).
+
+    The description is fitted here, once, with room for the scaffolding
+    CrewAI wraps around it.
+    """
+    from crewai import Agent as CrewAgent, Crew, Process, Task as CrewTask
+    from src.llm.crewai_llm import langchain_llm
+
+    budget = prompt_budget(getattr(agent.llm, "num_predict", None), PROMPT_OVERHEAD)
+    task = replace(task, description=fit_prompt(task.description, budget, label=f"{agent.role} task"))
+    crew_agent = CrewAgent(role=agent.role, goal=agent.goal, backstory=agent.backstory,
+                           llm=langchain_llm(agent.llm), verbose=agent.verbose)
+    crew_task = CrewTask(description=task.description, expected_output=task.expected_output,
+                         agent=crew_agent)
+    crew = Crew(agents=[crew_agent], tasks=[crew_task], process=Process.sequential,
+                verbose=agent.verbose)
+    return str(crew.kickoff())
@@ -0,0 +1,130 @@
+"""Events - typed progress events published by the orchestrator and delivered off the pipeline thread"""
+import queue
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Optional
+
+
+RUN_STARTED = "run_started"
+RUN_FINISHED = "run_finished"
+STAGE_STARTED = "stage_started"
+STAGE_FINISHED = "stage_finished"
+ITERATION = "iteration"
+TOKEN = "token"
+CACHE_HIT = "cache_hit"
+CASCADE_ESCALATED = "cascade_escalated"
+ERROR = "error"
+
+EVENT_KINDS = (RUN_STARTED, RUN_FINISHED, STAGE_STARTED, STAGE_FINISHED,
+               ITERATION, TOKEN, CACHE_HIT, CASCADE_ESCALATED, ERROR)
+
+
+@dataclass(frozen=True)
+class Event:
+    """Something that happened during a run.
+
+    data holds the kind-specific fields: "text" for tokens, the stage record
+    (wall_time, tokens, ...) for stage_finished, "error" for errors, "status"
+    for run_finished.
+    """
+    kind: str
+    query: Optional[str] = None
+    mode: Optional[str] = None
+    stage: Optional[str] = None
+    iteration: int = 1
+    timestamp: float = field(default_factory=time.time)
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class Subscription:
+    """One subscriber's queue and the thread that feeds its callback"""
+
+    def __init__(self, bus, callback, kinds, max_queue):
+        self.bus = bus
+        self.callback = callback
+        self.kinds = frozenset(kinds) if kinds else None
+        self.dropped = 0  # Events discarded because the callback fell behind
+        self.errors = 0  # Exceptions raised by the callback (swallowed)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._deliver, daemon=True,
+                                        name=f"events-{getattr(callback, '__name__', 'subscriber')}")
+        self._thread.start()
+
+    def offer(self, event):
+        """Queue an event without ever blocking the publisher"""
+        if self.kinds is not None and event.kind not in self.kinds:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def _deliver(self):
+        while True:
+            event = self._queue.get()
+            try:
+                if event is None:
+                    return
+                self.callback(event)
+            except Exception:
+                self.errors += 1
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """Wait until every queued event has been handed to the callback"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, flush=True):
+        """Unsubscribe; by default waits for queued events to be delivered first"""
+        self.bus.unsubscribe(self)
+        if flush:
+            self.flush()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass  # The thread is a daemon; it dies with the process
+
+
+class EventBus:
+    """Fan-out of events to subscribers, each on its own delivery thread.
+
+    publish() only appends to per-subscriber bounded queues, so a slow
+    subscriber loses events (counted in Subscription.dropped) instead of
+    stalling the pipeline. With no subscribers publish() is nearly free.
+    """
+
+    def __init__(self):
+        self._subscribers = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback, kinds=None, max_queue=10000):
+        """Call callback(event) for every event (or only the given kinds)"""
+        subscription = Subscription(self, callback, kinds, max_queue)
+        with self._lock:
+            self._subscribers = self._subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+
+    def __bool__(self):
+        return bool(self._subscribers)
+
+    def publish(self, kind, **fields):
+        subscribers = self._subscribers  # Replaced, never mutated, so no lock needed
+        if not subscribers:
+            return
+        event = Event(kind, **fields)
+        for subscription in subscribers:
+            subscription.offer(event)
@@ -0,0 +1,26 @@
+"""LLM access for CodeCrew"""
+
+from .client import OllamaClient, GenerationCancelled, get_client
+from .ollama import OllamaLLM, get_llm
+from .balancer import OllamaBalancer, node_stats
+from .runtime import LLMRuntime, get_runtime, llm_for
+from .scheduler import LLMScheduler, Admission, DeadlineMissed, get_admission
+from .streaming import streaming
+
+__all__ = [
+    "OllamaClient",
+    "GenerationCancelled",
+    "get_client",
+    "OllamaBalancer",
+    "node_stats",
+    "OllamaLLM",
+    "get_llm",
+    "LLMRuntime",
+    "get_runtime",
+    "llm_for",
+    "LLMScheduler",
+    "Admission",
+    "DeadlineMissed",
+    "get_admission",
+    "streaming"
+]
@@ -0,0 +1,258 @@
+"""
+Ollama Balancer - Spreads LLM calls over several Ollama servers
+
+Each call goes to the node with the fewest outstanding requests among those
+that are up and have the model. Calls with the same routing key (one
+request's stages) stay on the node that served the first of them, so the
+shared prompt prefix is already in that node's cache. A node that fails
+OLLAMA_EJECT_AFTER calls in a row sits out for OLLAMA_EJECT_SECONDS, and a
+background probe of /api/tags tracks which nodes answer and what they serve.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+from src.config import (
+    OLLAMA_BASE_URL, LLM_MAX_PARALLEL, OLLAMA_HEALTH_INTERVAL, OLLAMA_EJECT_AFTER, OLLAMA_EJECT_SECONDS,
+)
+from src.llm.client import OllamaClient, get_client
+from src.llm.scheduler import LLMScheduler
+from src.llm.streaming import routing_key
+
+
+STICKY_ROUTES = 4096  # Routing keys remembered; the least recently used are forgotten
+LATENCY_WINDOW = 200  # Recent latencies kept per node for percentiles
+LATENCY_SMOOTHING = 0.2  # Weight of the newest latency in the moving average
+PROBE_TIMEOUT = 5  # Seconds
+
+
+def node_urls(base_url):
+    """The servers listed in a comma-separated OLLAMA_BASE_URL"""
+    return [url.strip().rstrip("/") for url in base_url.split(",") if url.strip()]
+
+
+def model_names(tags):
+    """Names a model can be requested by, from an /api/tags reply ("llama3.2:latest" is also "llama3.2")"""
+    names = set()
+    for entry in tags.get("models", []):
+        name = entry.get("name") or entry.get("model")
+        if name:
+            names.add(name)
+            if name.endswith(":latest"):
+                names.add(name[:-len(":latest")])
+    return names
+
+
+class Node:
+    """One Ollama server with its own connection pool, slots and health record"""
+
+    def __init__(self, url):
+        self.url = url
+        # Every server runs LLM_MAX_PARALLEL generations; more calls queue per node
+        self.client = OllamaClient(url, slots=LLMScheduler(LLM_MAX_PARALLEL))
+        self.outstanding = 0  # Calls routed here and not finished, queued ones included
+        self.requests = 0
+        self.errors = 0
+        self.failures = 0  # Consecutive; reset by a successful call
+        self.ejected_until = 0.0
+        self.healthy = True  # Whether the last probe was answered
+        self.models = None  # From /api/tags; None until the first probe
+        self.latency = None  # Moving average, seconds
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def available(self, now):
+        return self.healthy and now >= self.ejected_until
+
+    def serves(self, model):
+        return self.models is None or model in self.models
+
+    def observe(self, seconds):
+        self.latencies.append(seconds)
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += LATENCY_SMOOTHING * (seconds - self.latency)
+
+    def stats(self, now):
+        ordered = sorted(self.latencies)
+
+        def percentile(pct):
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))], 4)
+
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "ejected": now < self.ejected_until,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_avg": round(self.latency, 4) if self.latency is not None else None,
+            "latency_p50": percentile(50),
+            "latency_p95": percentile(95),
+            "models": sorted(self.models) if self.models is not None else None,
+        }
+
+
+class OllamaBalancer:
+    """Stands in for OllamaClient, sending each call to one of several servers.
+
+    A call that fails before the first byte of its answer (connection error,
+    5xx, or the model missing on that node) is retried on another node;
+    once a stream has started, a failure goes to the caller.
+    Latency is measured to the start of the answer: the first chunk of a
+    stream or the whole reply of a non-streaming call.
+    """
+
+    def __init__(self, urls, health_interval=None):
+        self.nodes = [Node(url) for url in urls]
+        self.base_url = ",".join(urls)
+        self.health_interval = OLLAMA_HEALTH_INTERVAL if health_interval is None else health_interval
+        self._routes = OrderedDict()  # (routing key, model) -> node url
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        if self.health_interval > 0:
+            threading.Thread(target=self._probe_loop, name="ollama-health", daemon=True).start()
+
+    def choose(self, model, exclude=()):
+        """Pick a node for a call and count it as outstanding there"""
+        key = routing_key.get()
+        now = time.monotonic()
+        with self._lock:
+            nodes = [n for n in self.nodes if n.url not in exclude]
+            # With every node down, trying one beats failing without a request
+            nodes = [n for n in nodes if n.available(now)] or nodes
+            nodes = [n for n in nodes if n.serves(model)] or nodes
+            least = min(nodes, key=lambda n: (n.outstanding, n.latency or 0.0))
+            node = None
+            if key is not None:
+                url = self._routes.get((key, model))
+                node = next((n for n in nodes if n.url == url), None)
+                # Stay for the warm cache, unless the calls would queue there while another node is free
+                if node is not None and node.outstanding - least.outstanding >= LLM_MAX_PARALLEL:
+                    node = None
+                self._routes[(key, model)] = (node or least).url
+                self._routes.move_to_end((key, model))
+                while len(self._routes) > STICKY_ROUTES:
+                    self._routes.popitem(last=False)
+            node = node or least
+            node.outstanding += 1
+            node.requests += 1
+        return node
+
+    def _finish(self, node, model, latency, error):
+        """Book the end of a call; True if it failed in a way another node may not"""
+        with self._lock:
+            node.outstanding -= 1
+            if error is None:
+                node.failures = 0
+                if latency is not None:
+                    node.observe(latency)
+                return False
+            node.errors += 1
+            status = getattr(getattr(error, "response", None), "status_code", None)
+            if status is not None and status < 500:
+                if status == 404 and node.models is not None:
+                    node.models.discard(model)  # Not pulled here (anymore)
+                return status == 404  # Any other client error would fail everywhere
+            node.failures += 1
+            if node.failures >= OLLAMA_EJECT_AFTER:
+                node.ejected_until = time.monotonic() + OLLAMA_EJECT_SECONDS
+            return True
+
+    def generate(self, model, prompt, options=None, stop=None, system=None, **extra):
+        """OllamaClient.generate on the chosen node; the reply names the node"""
+        tried = set()
+        while True:
+            node = self.choose(model, tried)
+            tried.add(node.url)
+            started, latency, error = time.perf_counter(), None, None
+            try:
+                reply = node.client.generate(model, prompt, options, stop, system, **extra)
+                latency = time.perf_counter() - started
+                reply["node"] = node.url
+                return reply
+            except OSError as e:  # requests' exceptions are OSErrors
+                error = e
+            finally:
+                retry = self._finish(node, model, latency, error)
+            if not retry or len(tried) == len(self.nodes):
+                raise error
+
+    def stream(self, model, prompt, options=None, stop=None, system=None, cancel=None, **extra):
+        """OllamaClient.stream on the chosen node; every chunk names the node"""
+        tried = set()
+        while True:
+            node = self.choose(model, tried)
+            tried.add(node.url)
+            started, latency, error = time.perf_counter(), None, None
+            try:
+                for chunk in node.client.stream(model, prompt, options, stop, system, cancel, **extra):
+                    if latency is None:
+                        latency = time.perf_counter() - started
+                    chunk["node"] = node.url
+                    yield chunk
+                return
+            except OSError as e:
+                error = e
+                if latency is not None:
+                    raise  # Part of the answer is out; it cannot be restarted elsewhere
+            finally:
+                retry = self._finish(node, model, latency, error)
+            if not retry or len(tried) == len(self.nodes):
+                raise error
+
+    def load(self, model, keep_alive=None, options=None):
+        """Load model on every available node that has it; returns the slowest reply"""
+        now = time.monotonic()
+        with self._lock:
+            nodes = [n for n in self.nodes if n.available(now) and n.serves(model)] or list(self.nodes)
+        replies, error = [], None
+        for node in nodes:
+            try:
+                replies.append(node.client.load(model, keep_alive=keep_alive, options=options))
+            except OSError as e:
+                error = e
+        if not replies:
+            raise error
+        return max(replies, key=lambda r: r.get("load_duration") or 0)
+
+    def probe(self):
+        """Ask every node for its models; a node that does not answer is marked down"""
+        for node in self.nodes:
+            try:
+                response = node.client.session.get(f"{node.url}/api/tags", timeout=PROBE_TIMEOUT)
+                response.raise_for_status()
+                models = model_names(response.json())
+            except (OSError, ValueError):
+                with self._lock:
+                    node.healthy = False
+                continue
+            with self._lock:
+                node.healthy = True
+                node.models = models
+
+    def _probe_loop(self):
+        while not self._stopped.is_set():
+            self.probe()
+            self._stopped.wait(self.health_interval)
+
+    def stats(self):
+        """Health, load and latency of every node"""
+        now = time.monotonic()
+        with self._lock:
+            return [node.stats(now) for node in self.nodes]
+
+    def close(self):
+        self._stopped.set()
+        for node in self.nodes:
+            node.client.close()
+
+
+def node_stats(base_url=None):
+    """Per-node stats of the configured servers; empty for a single server"""
+    base_url = base_url or OLLAMA_BASE_URL
+    if "," not in base_url:
+        return []
+    return get_client(base_url).stats()
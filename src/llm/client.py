@@ -0,0 +1,108 @@
+"""
+Ollama Client - Pooled keep-alive HTTP client for the Ollama REST API
+"""
+import json
+import threading
+
+from src.config import OLLAMA_POOL_SIZE, OLLAMA_TIMEOUT, LLM_MAX_PARALLEL
+from src.llm.scheduler import LLMScheduler
+
+
+# Caps in-flight generations across every pipeline in the process, so
+# concurrent stages queue here (by priority class) rather than overloading the server
+llm_slots = LLMScheduler(LLM_MAX_PARALLEL)
+
+
+class GenerationCancelled(Exception):
+    """Raised inside a streaming generation when its cancel event is set"""
+
+
+class OllamaClient:
+    """Thin wrapper over /api/generate sharing one connection pool per server"""
+
+    def __init__(self, base_url, pool_size=None, timeout=None, slots=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout or OLLAMA_TIMEOUT
+        self.slots = slots or llm_slots
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size or OLLAMA_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _payload(self, model, prompt, options, stop, system, stream, extra):
+        payload = {"model": model, "prompt": prompt, "stream": stream, **extra}
+        options = dict(options or {})
+        if stop:
+            options["stop"] = list(stop)
+        if options:
+            payload["options"] = options
+        if system:
+            payload["system"] = system
+        return payload
+
+    def generate(self, model, prompt, options=None, stop=None, system=None, **extra):
+        """Run one non-streaming completion and return Ollama's JSON reply"""
+        payload = self._payload(model, prompt, options, stop, system, False, extra)
+        with self.slots:
+            response = self.session.post(
+                f"{self.base_url}/api/generate", json=payload, timeout=self.timeout
+            )
+        response.raise_for_status()
+        return response.json()
+
+    def stream(self, model, prompt, options=None, stop=None, system=None, cancel=None, **extra):
+        """Yield Ollama's JSON chunks as they arrive; the last one has done=True.
+
+        Setting `cancel` (a threading.Event) closes the connection, which makes
+        Ollama stop generating, and raises GenerationCancelled.
+        """
+        payload = self._payload(model, prompt, options, stop, system, True, extra)
+        with self.slots:
+            if cancel is not None and cancel.is_set():
+                raise GenerationCancelled()  # Cancelled while queued for a slot
+            with self.session.post(f"{self.base_url}/api/generate", json=payload,
+                                   stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if cancel is not None and cancel.is_set():
+                        raise GenerationCancelled()
+                    if line:
+                        yield json.loads(line)
+
+    def load(self, model, keep_alive=None, options=None):
+        """Load a model without generating (an empty prompt); returns Ollama's reply"""
+        payload = {"model": model, "stream": False}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        if options:
+            payload["options"] = options
+        response = self.session.post(f"{self.base_url}/api/generate", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url):
+    """Shared client (and connection pool) for a server, created on first use.
+
+    A comma-separated list of servers gets an OllamaBalancer over all of them.
+    """
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            if "," in base_url:
+                from src.llm.balancer import OllamaBalancer, node_urls
+                client = OllamaBalancer(node_urls(base_url))
+            else:
+                client = OllamaClient(base_url)
+            _clients[base_url] = client
+        return client
@@ -0,0 +1,43 @@
+"""
+CrewAI LLM - LangChain wrapper around OllamaLLM for the crewai backend
+
+CrewAI agents need a LangChain model; only this module imports langchain,
+and only the crewai backend imports this module.
+"""
+import threading
+from typing import Any, List, Optional
+
+from langchain.llms.base import LLM
+
+from src.llm.ollama import OllamaLLM
+
+
+class LangChainOllama(LLM):
+    """Drop-in for langchain.llms.Ollama that makes its calls through an OllamaLLM"""
+
+    llm: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "ollama"
+
+    @property
+    def _identifying_params(self):
+        return {"model": self.llm.model, "base_url": self.llm.base_url, **self.llm.settings()}
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Any = None, **kwargs: Any) -> str:
+        return self.llm._call(prompt, stop, run_manager)
+
+
+_wrappers = {}
+_wrappers_lock = threading.Lock()
+
+
+def langchain_llm(llm: OllamaLLM):
+    """Shared LangChain wrapper of an OllamaLLM"""
+    with _wrappers_lock:
+        wrapper = _wrappers.get(id(llm))
+        if wrapper is None or wrapper.llm is not llm:
+            wrapper = _wrappers[id(llm)] = LangChainOllama(llm=llm)
+        return wrapper
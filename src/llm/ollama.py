@@ -0,0 +1,105 @@
+"""
+Ollama LLM - One model with fixed sampling settings, called through the pooled Ollama client
+
+Plain Python, so the direct engine never imports langchain; the crewai
+backend wraps it with src.llm.langchain.langchain_llm.
+"""
+import threading
+from contextlib import closing
+from typing import Any, List, Optional
+
+from src.config import LLM_MODEL, OLLAMA_BASE_URL
+from src.llm.client import get_client
+from src.llm.runtime import get_runtime
+from src.llm.streaming import token_callback, cancel_event, usage_callback, sampling_options, stop_condition
+
+
+SETTINGS = ("temperature", "top_p", "top_k", "num_ctx", "num_predict", "stop")
+
+
+class OllamaLLM:
+    """A model on an Ollama server (a comma-separated list is balanced) with
+    fixed sampling settings; None leaves a setting to the server
+    """
+
+    def __init__(self, model=None, base_url=None, temperature: Optional[float] = None,
+                 top_p: Optional[float] = None, top_k: Optional[int] = None,
+                 num_ctx: Optional[int] = None, num_predict: Optional[int] = None,
+                 stop: Optional[List[str]] = None):
+        self.model = model or LLM_MODEL
+        self.base_url = base_url or OLLAMA_BASE_URL
+        self.temperature = temperature
+        self.top_p = top_p
+        self.top_k = top_k
+        self.num_ctx = num_ctx
+        self.num_predict = num_predict
+        self.stop = stop
+
+    def settings(self):
+        """The sampling settings that were set explicitly"""
+        return {n: getattr(self, n) for n in SETTINGS if getattr(self, n) is not None}
+
+    def predict(self, text: str, stop: Optional[List[str]] = None) -> str:
+        """Completion of text (same call as a langchain LLM's predict)"""
+        return self._call(text, stop)
+
+    def _options(self):
+        """Sampling options that were set explicitly, plus per-call overrides; the server defaults the rest"""
+        names = ("temperature", "top_p", "top_k", "num_ctx", "num_predict")
+        options = {n: getattr(self, n) for n in names if getattr(self, n) is not None}
+        options.update(sampling_options.get() or {})
+        return options
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Any = None, **kwargs: Any) -> str:
+        client = get_client(self.base_url)
+        on_token, cancel = token_callback.get(), cancel_event.get()
+        on_usage, until = usage_callback.get(), stop_condition.get()
+        runtime = get_runtime(self.base_url)
+        options = self._options()
+        options.setdefault("num_ctx", runtime.context_size(self.model, prompt, options.get("num_predict")))
+        stop = [*(stop or self.stop or ()), *options.pop("stop", ())] or None
+        if on_token is None and cancel is None and until is None:
+            reply = client.generate(self.model, prompt, options=options, stop=stop,
+                                    keep_alive=runtime.keep_alive)
+            if on_usage is not None:
+                on_usage(reply)
+            return reply.get("response", "")
+
+        parts = []
+        complete = until() if until is not None else None
+        # Closing the stream early drops the connection, which stops Ollama generating
+        with closing(client.stream(self.model, prompt, options=options, stop=stop,
+                                   cancel=cancel, keep_alive=runtime.keep_alive)) as chunks:
+            for chunk in chunks:
+                if chunk.get("done") and on_usage is not None:
+                    on_usage(chunk)
+                text = chunk.get("response", "")
+                if not text:
+                    continue
+                parts.append(text)
+                if on_token is not None:
+                    on_token(text)
+                if run_manager is not None:
+                    run_manager.on_llm_new_token(text)
+                if complete is not None and complete(text):
+                    if on_usage is not None:
+                        # No final chunk is coming; one streamed chunk is one token
+                        on_usage({"eval_count": len(parts), "done_reason": "early_stop",
+                                  "node": chunk.get("node")})
+                    break
+        return "".join(parts)
+
+
+_llms = {}
+_llms_lock = threading.Lock()
+
+
+def get_llm(model=None, base_url=None, **params):
+    """Shared LLM instance per (model, base_url, sampling params)"""
+    key = (model or LLM_MODEL, base_url or OLLAMA_BASE_URL, tuple(sorted(params.items())))
+    with _llms_lock:
+        llm = _llms.get(key)
+        if llm is None:
+            llm = _llms[key] = OllamaLLM(model=key[0], base_url=key[1], **params)
+        return llm
@@ -0,0 +1,123 @@
+"""
+LLM Runtime - Keeps Ollama models loaded and sizes each call's context and output
+"""
+import threading
+
+from src.config import (
+    LLM_MODEL, OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE, CONTEXT_WINDOW, MAX_TOKENS, AGENT_MODELS,
+    AGENT_MAX_TOKENS, AGENT_TEMPERATURE, CASCADE_MODEL, REVIEW_LIGHT_MODEL,
+)
+from src.llm.client import get_client
+from src.prompting import CONTEXT_MARGIN, PROMPT_OVERHEAD, count_tokens
+
+
+MIN_CONTEXT = 2048
+
+
+def context_buckets():
+    """Allowed num_ctx values: powers of two from MIN_CONTEXT up to CONTEXT_WINDOW"""
+    buckets, size = [], MIN_CONTEXT
+    while size < CONTEXT_WINDOW:
+        buckets.append(size)
+        size *= 2
+    return buckets + [CONTEXT_WINDOW]
+
+
+class LLMRuntime:
+    """Per-server bookkeeping of loaded models and their context sizes.
+
+    Ollama reloads a model whenever a request asks for a different num_ctx
+    than it was loaded with, so a model's context only grows, a bucket at a
+    time, from the smallest one that holds its agents' largest output.
+    """
+
+    def __init__(self, base_url=None, keep_alive=None):
+        self.base_url = base_url or OLLAMA_BASE_URL
+        keep_alive = keep_alive or OLLAMA_KEEP_ALIVE
+        # Ollama takes a duration ("30m") or a number of seconds (-1 = never unload)
+        self.keep_alive = int(keep_alive) if keep_alive.lstrip("-").isdigit() else keep_alive
+        self.warm = {}  # model -> seconds the preload took, or the error it raised
+        self._context = {}  # model -> num_ctx it is loaded with
+        self._lock = threading.Lock()
+
+    def planned_context(self, model):
+        """Starting context: room for the largest output of the agents routed to model"""
+        kinds = [k for k, m in AGENT_MODELS.items() if (m or LLM_MODEL) == model] or list(AGENT_MODELS)
+        return self._bucket(PROMPT_OVERHEAD + max(AGENT_MAX_TOKENS[k] for k in kinds))
+
+    @staticmethod
+    def _bucket(tokens):
+        for size in context_buckets():
+            if size >= tokens:
+                return size
+        return CONTEXT_WINDOW
+
+    def context_size(self, model, prompt, num_predict=None):
+        """num_ctx for a call: fits the prompt plus its output, never below what the model has"""
+        needed = int(count_tokens(prompt) * CONTEXT_MARGIN) + (num_predict or MAX_TOKENS)
+        with self._lock:
+            current = self._context.get(model) or self.planned_context(model)
+            size = self._context[model] = max(current, self._bucket(needed))
+        return size
+
+    def options(self, kind):
+        """Output budget and temperature for an agent kind"""
+        return {"num_predict": AGENT_MAX_TOKENS[kind], "temperature": AGENT_TEMPERATURE[kind]}
+
+    def configured_models(self):
+        """Every model the pipeline may call"""
+        models = {m or LLM_MODEL for m in AGENT_MODELS.values()}
+        models.update(m for m in (CASCADE_MODEL, REVIEW_LIGHT_MODEL) if m)
+        return sorted(models)
+
+    def preload(self, model):
+        """Load model into memory at its planned context and keep it resident"""
+        with self._lock:
+            num_ctx = self._context.setdefault(model, self.planned_context(model))
+        reply = get_client(self.base_url).load(model, keep_alive=self.keep_alive,
+                                               options={"num_ctx": num_ctx})
+        self.warm[model] = round((reply.get("load_duration") or 0) / 1e9, 3)
+        return reply
+
+    def warm_up(self, models=None, wait=False):
+        """Preload models in the background (once each) so the first request skips the load"""
+        with self._lock:
+            pending = [m for m in (models or self.configured_models()) if m not in self.warm]
+            for model in pending:
+                self.warm[model] = None
+
+        def load_all():
+            for model in pending:
+                try:
+                    self.preload(model)
+                except Exception as e:
+                    self.warm[model] = f"{type(e).__name__}: {e}"
+
+        thread = threading.Thread(target=load_all, name="ollama-warm-up", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return thread
+
+
+_runtimes = {}
+_runtimes_lock = threading.Lock()
+
+
+def get_runtime(base_url=None):
+    """Shared runtime per Ollama server"""
+    base_url = base_url or OLLAMA_BASE_URL
+    with _runtimes_lock:
+        runtime = _runtimes.get(base_url)
+        if runtime is None:
+            runtime = _runtimes[base_url] = LLMRuntime(base_url)
+        return runtime
+
+
+def llm_for(kind, model=None):
+    """Shared LLM for an agent kind: its model (AGENT_MODELS, then LLM_MODEL),
+    output budget and temperature, with the context sized per call
+    """
+    from src.llm.ollama import get_llm
+
+    return get_llm(model or AGENT_MODELS.get(kind) or LLM_MODEL, **get_runtime().options(kind))
@@ -0,0 +1,212 @@
+"""
+LLM Scheduler - Priority classes, per-class caps and fair queuing for a server's slots
+
+Calls are admitted interactive first, then standard, then batch. While
+another class is active (calls running, waiting, or seen in the last
+LLM_ACTIVE_WINDOW seconds) a class may hold at most LLM_CLASS_SLOTS of a
+server's slots, and while interactive calls are active LLM_INTERACTIVE_RESERVED
+slots are only given to them, so a fast request does not wait for a long
+verified run to finish a generation. With a single class in use it gets
+every slot. Within a class the waiting calls are served round-robin by user.
+
+Admission decides at the start of a request whether its mode can finish
+within a deadline, given the queue ahead and recent run times, and falls
+back to a cheaper mode (verified -> standard -> fast) when it cannot.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+from src.config import (
+    OLLAMA_BASE_URL, LLM_MAX_PARALLEL, LLM_CLASS_SLOTS, LLM_INTERACTIVE_RESERVED, LLM_ACTIVE_WINDOW,
+)
+from src.llm.streaming import call_priority, call_user
+
+
+PRIORITIES = ("interactive", "standard", "batch")  # Highest first
+MODE_PRIORITY = {"fast": "interactive", "verified": "batch"}  # Any other mode is standard
+DOWNGRADE = {"verified": "standard", "combined": "standard", "speculative": "standard", "standard": "fast"}
+SMOOTHING = 0.2  # Weight of the newest duration in the moving averages
+
+
+class DeadlineMissed(Exception):
+    """Raised when a request would miss its deadline even in the cheapest mode"""
+
+
+def priority_of(mode):
+    return MODE_PRIORITY.get(mode, "standard")
+
+
+def _average(current, seconds):
+    return seconds if current is None else current + SMOOTHING * (seconds - current)
+
+
+class LLMScheduler:
+    """Gives `capacity` slots to waiting calls by class, then round-robin by user.
+
+    Used as a context manager around a call, like a semaphore; the class and
+    user come from streaming() (call_priority, call_user).
+    """
+
+    def __init__(self, capacity=None, limits=None, reserved=None, active_window=None):
+        self.capacity = capacity or LLM_MAX_PARALLEL
+        self.limits = {p: min(self.capacity, n) for p, n in (limits or LLM_CLASS_SLOTS).items()}
+        reserved = LLM_INTERACTIVE_RESERVED if reserved is None else reserved
+        self.reserved = max(0, min(reserved, self.capacity - 1))  # A single slot can't be reserved
+        self.active_window = LLM_ACTIVE_WINDOW if active_window is None else active_window
+        self._last_seen = {p: float("-inf") for p in PRIORITIES}  # monotonic time of each class's last call
+        self.running = {p: 0 for p in PRIORITIES}
+        self.served = {p: 0 for p in PRIORITIES}
+        self.waited = {p: 0.0 for p in PRIORITIES}  # Total seconds spent queued
+        self.call_seconds = None  # Moving average of a call's time in its slot
+        self._queues = {p: OrderedDict() for p in PRIORITIES}  # user -> deque of waiting events
+        self._held = threading.local()  # Slots taken by `with`, so __exit__ knows what to release
+        self._lock = threading.Lock()
+
+    def _active(self, priority, now):
+        return bool(self.running[priority] or self._queues[priority]
+                    or now - self._last_seen[priority] < self.active_window)
+
+    def _can_start(self, priority):
+        total = sum(self.running.values())
+        if total >= self.capacity:
+            return False
+        now = time.monotonic()
+        # Caps and the reserve only hold a class back while another class needs the slots
+        if self.running[priority] >= self.limits[priority] and any(
+                self._active(p, now) for p in PRIORITIES if p != priority):
+            return False
+        if priority != "interactive" and self._active("interactive", now):
+            return total < self.capacity - self.reserved
+        return True
+
+    def _dispatch(self):
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue and self._can_start(priority):
+                user, waiters = next(iter(queue.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    queue.move_to_end(user)  # Next call of this class goes to another user
+                else:
+                    del queue[user]
+                self.running[priority] += 1
+                waiter.set()
+
+    def acquire(self, priority=None, user=None):
+        """Wait for a slot; returns the token to release it with"""
+        priority = priority or call_priority.get() or "standard"
+        if priority not in self.running:
+            raise ValueError(f"unknown priority {priority!r}; expected one of {PRIORITIES}")
+        user = user if user is not None else call_user.get()
+        waiter = threading.Event()
+        queued = time.perf_counter()
+        with self._lock:
+            self._last_seen[priority] = time.monotonic()
+            self._queues[priority].setdefault(user, deque()).append(waiter)
+            self._dispatch()
+        waiter.wait()
+        started = time.perf_counter()
+        with self._lock:
+            self.served[priority] += 1
+            self.waited[priority] += started - queued
+        return priority, started
+
+    def release(self, token):
+        priority, started = token
+        with self._lock:
+            self.running[priority] -= 1
+            self.call_seconds = _average(self.call_seconds, time.perf_counter() - started)
+            self._dispatch()
+
+    def __enter__(self):
+        held = getattr(self._held, "tokens", None)
+        if held is None:
+            held = self._held.tokens = []
+        held.append(self.acquire())
+        return self
+
+    def __exit__(self, *exc):
+        self.release(self._held.tokens.pop())
+
+    def estimate_wait(self, priority):
+        """Rough seconds a new call of this class would queue: the calls ahead of
+        it, served as many at a time as the class may hold
+        """
+        rank = PRIORITIES.index(priority)
+        with self._lock:
+            ahead = sum(len(w) for p in PRIORITIES[:rank + 1] for w in self._queues[p].values())
+            if not ahead and self._can_start(priority):
+                return 0.0
+            now = time.monotonic()
+            slots = self.capacity
+            if any(self._active(p, now) for p in PRIORITIES if p != priority):
+                slots = self.limits[priority]
+            if priority != "interactive" and self._active("interactive", now):
+                slots = min(slots, self.capacity - self.reserved)
+            return (ahead + 1) * (self.call_seconds or 0.0) / max(1, slots)
+
+    def stats(self):
+        with self._lock:
+            waiting = {p: sum(len(w) for w in self._queues[p].values()) for p in PRIORITIES}
+            return {
+                "capacity": self.capacity,
+                "running": dict(self.running),
+                "waiting": waiting,
+                "served": dict(self.served),
+                "avg_wait": {p: round(self.waited[p] / self.served[p], 4) if self.served[p] else None
+                             for p in PRIORITIES},
+                "call_seconds": round(self.call_seconds, 4) if self.call_seconds is not None else None,
+            }
+
+
+def schedulers(base_url=None):
+    """The scheduler of each configured server"""
+    from src.llm.client import get_client
+
+    client = get_client(base_url or OLLAMA_BASE_URL)
+    return [node.client.slots for node in client.nodes] if hasattr(client, "nodes") else [client.slots]
+
+
+class Admission:
+    """Deadline check at the start of a request, from recent run times per mode"""
+
+    def __init__(self):
+        self.run_seconds = {}  # mode -> moving average of completed runs
+        self._lock = threading.Lock()
+
+    def observe(self, mode, seconds):
+        with self._lock:
+            self.run_seconds[mode] = _average(self.run_seconds.get(mode), seconds)
+
+    def estimate(self, mode, priority=None):
+        """Seconds until a request started now would finish: queue wait plus a typical run"""
+        wait = min(s.estimate_wait(priority or priority_of(mode)) for s in schedulers())
+        with self._lock:
+            return wait + (self.run_seconds.get(mode) or 0.0)
+
+    def admit(self, mode, deadline, priority=None):
+        """The mode to run: `mode` if it is estimated to finish within deadline
+        seconds, else the first fallback that is; raises DeadlineMissed if none is
+        """
+        estimates = []
+        while mode:
+            estimate = self.estimate(mode, priority)
+            if estimate <= deadline:
+                return mode
+            estimates.append(f"{mode} ~{estimate:.1f}s")
+            mode = DOWNGRADE.get(mode)
+        raise DeadlineMissed(f"estimated {', '.join(estimates)} > deadline {deadline:g}s")
+
+
+_default_admission = None
+_default_lock = threading.Lock()
+
+
+def get_admission():
+    """Process-wide admission control; run times are learned across orchestrators"""
+    global _default_admission
+    with _default_lock:
+        if _default_admission is None:
+            _default_admission = Admission()
+        return _default_admission
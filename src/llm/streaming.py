@@ -0,0 +1,56 @@
+"""Streaming - per-call token callback, cancel event, sampling overrides, stop condition, routing key and scheduling class, carried in context variables"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+token_callback = ContextVar("token_callback", default=None)
+cancel_event = ContextVar("cancel_event", default=None)
+usage_callback = ContextVar("usage_callback", default=None)
+sampling_options = ContextVar("sampling_options", default=None)
+stop_condition = ContextVar("stop_condition", default=None)
+routing_key = ContextVar("routing_key", default=None)
+call_priority = ContextVar("call_priority", default=None)
+call_user = ContextVar("call_user", default=None)
+
+
+@contextmanager
+def streaming(on_token=None, cancel=None, on_usage=None, options=None, until=None, route=None,
+              priority=None, user=None):
+    """Route tokens of LLM calls made inside the block to on_token(text).
+
+    on_usage(reply) receives Ollama's final reply (token counts, durations)
+    once per LLM call. options (e.g. {"seed": 1, "temperature": 0.5}) are
+    merged over the LLM's own sampling options; a "stop" list is added to
+    the stop sequences.
+
+    until() is called at the start of each LLM call and returns a function
+    that is fed every token; generation ends as soon as it returns True.
+
+    With several Ollama servers, calls sharing a route key go to the same
+    server, whose prompt cache then already holds their common prefix.
+
+    priority ("interactive", "standard" or "batch") and user decide the
+    order in which the calls get a server slot (see LLMScheduler).
+
+    Context variables follow the call into CrewAI's executor (and into
+    asyncio.to_thread workers), so no LLM object needs to be mutated.
+    """
+    token_reset = token_callback.set(on_token)
+    cancel_reset = cancel_event.set(cancel)
+    usage_reset = usage_callback.set(on_usage)
+    options_reset = sampling_options.set(options)
+    until_reset = stop_condition.set(until)
+    route_reset = routing_key.set(route)
+    priority_reset = call_priority.set(priority)
+    user_reset = call_user.set(user)
+    try:
+        yield
+    finally:
+        token_callback.reset(token_reset)
+        cancel_event.reset(cancel_reset)
+        usage_callback.reset(usage_reset)
+        sampling_options.reset(options_reset)
+        stop_condition.reset(until_reset)
+        routing_key.reset(route_reset)
+        call_priority.reset(priority_reset)
+        call_user.reset(user_reset)
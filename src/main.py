@@ -1,74 +1,322 @@
 """Main orchestrator - runs the code generation pipeline"""
+import asyncio
+import contextvars
+import copy
+import inspect
 import json
-import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from crewai import Crew, Process
 
-from src.agents.developer import create_developer_agent
-from src.agents.qa_debugger import create_qa_agent
-from src.agents.reviewer import create_reviewer_agent
-from src.agents.usecase_agent import create_usecase_agent
-from src.agents.testing_agent import create_testing_agent
+from src.agents.registry import get_agent
+from src.events import EventBus, TOKEN, CACHE_HIT, CASCADE_ESCALATED
+from src.engine import run_crewai, run_direct
+from src.llm.client import GenerationCancelled
+from src.llm.runtime import get_runtime
+from src.llm.scheduler import get_admission, priority_of
+from src.llm.streaming import streaming
 from src.tasks.code_generation import create_code_generation_task
 from src.tasks.debugging import create_debugging_task
 from src.tasks.validation import create_validation_task
 from src.tasks.usecase_generation import create_usecase_task
 from src.tasks.testing import create_testing_task
-from src.config import MAX_ITERATIONS
+from src.metrics import active_run, current_run, instrumented
+from src.cascade import ACCEPT
+from src.confidence import score_confidence
+from src.pipeline import Pipeline, Stage
+from src.prompting import summarize_feedback
+from src.tools.code_fence import CodeFenceExtractor, extract_code
+from src.tools.code_executor import (
+    execute_tests, format_failures, format_report, function_signatures,
+    parse_scenarios, run_program, run_scenarios,
+)
+from src.tools.llm_cache import cache_key, get_llm_cache
+from src.tools.query_index import get_query_index
+from src.tools.run_history import get_run_history
+from src.tools.static_checks import check_code, format_errors
+from src.config import (
+    MAX_ITERATIONS, LLM_CACHE_ENABLED, METRICS_JSONL, METRICS_TRACE, EXECUTION_BACKEND,
+    STATIC_GATE_RETRIES, TEST_REGRESSION_SAMPLE, REVIEW_LIGHT_MODEL,
+    TEMPERATURE, SPECULATIVE_CANDIDATES, SPECULATIVE_TEMPERATURE_STEP,
+    QUERY_INDEX_ENABLED, QUERY_REUSE_THRESHOLD, QUERY_WARM_START_THRESHOLD, RUN_HISTORY_ENABLED,
+    EARLY_STOP_ENABLED, CASCADE_MODEL, REQUEST_DEADLINE
+)
+
+
+class ChainedEvent(threading.Event):
+    """A cancel flag that also reads as set while its parent's is, so a worker
+    stops when it is cancelled itself or when the orchestrator it came from is
+    """
+    
+    def __init__(self, parent):
+        super().__init__()
+        self.parent = parent
+    
+    def is_set(self):
+        return super().is_set() or self.parent.is_set()
 
 
 class CodeCrewOrchestrator:
     """Runs the multi-agent code generation workflow"""
     
-    def __init__(self, verbose=True):
+    def __init__(self, verbose=True, use_cache=None, on_token=None, backend=None):
         self.verbose = verbose
+        self.backend = backend or EXECUTION_BACKEND  # "direct" or "crewai"
         self.max_iterations = MAX_ITERATIONS
+        self.use_cache = LLM_CACHE_ENABLED if use_cache is None else use_cache
+        self.use_index = self.use_cache and QUERY_INDEX_ENABLED  # Reuse results of near-duplicate queries
+        self.on_token = on_token  # Called as on_token(stage, text) while a stage generates
+        self.events = EventBus()  # Progress events; subscribe with self.events.subscribe(callback)
+        self.cancel_event = threading.Event()
+        self.sampling = None  # Per-call sampling overrides (speculative candidates)
+        self.early_stop = EARLY_STOP_ENABLED  # End code generation at the closing fence
+        self.cascade_model = CASCADE_MODEL or None  # Small model each stage tries before its own
+        self.priority = None  # Scheduling class of LLM calls; None = by mode (fast interactive, verified batch)
+        self.user = None  # Whom requests are for; waiting LLM calls are served round-robin by user
+        self.deadline = REQUEST_DEADLINE  # Seconds; process() downgrades a mode estimated to take longer
+        self.metrics_path = METRICS_JSONL or None  # Append per-stage metrics as JSONL
+        self.trace_path = METRICS_TRACE or None  # Chrome trace file (or directory of them)
+        self.history = get_run_history() if RUN_HISTORY_ENABLED else None  # Every run is recorded here
+    
+    def warm_up(self):
+        """Start loading every model this pipeline can call (in the background, once per model).
+        
+        Entry points (cli, the job server) call this or runtime.warm_up() once
+        at start when OLLAMA_WARMUP is set; constructing an orchestrator loads nothing.
+        """
+        runtime = get_runtime()
+        models = runtime.configured_models()
+        if self.cascade_model and self.cascade_model not in models:
+            models.append(self.cascade_model)
+        return runtime.warm_up(models)
     
     def log(self, msg):
         if self.verbose:
             print(msg)
     
-    def run_crew(self, agent, task):
-        """Run a single agent with a task"""
-        crew = Crew(
-            agents=[agent],
-            tasks=[task],
-            process=Process.sequential,
-            verbose=self.verbose
-        )
-        return str(crew.kickoff())
+    def cancel(self):
+        """Abort the generation in progress; later stages fail fast until cancel_event is cleared"""
+        self.cancel_event.set()
+    
+    def run_crew(self, agent, task, stage=None, stop=None, until=None):
+        """Run a single agent with a task, reusing a cached answer if there is one.
+        
+        stop adds stop sequences for Ollama; until (see streaming()) ends the
+        generation as soon as the output is complete.
+        """
+        if self.cancel_event.is_set():
+            raise GenerationCancelled()
+        stage = stage or agent.role
+        run = active_run()
+        options = {**(self.sampling or {}), "stop": list(stop)} if stop else self.sampling
+        
+        with run.stage(stage) as record:
+            mark_first_token = run.token_timer(record, time.perf_counter())
+            
+            def emit(text):
+                mark_first_token(text)
+                run.publish(TOKEN, stage, text=text)
+                if self.on_token:
+                    self.on_token(stage, text)
+            
+            if self.use_cache:
+                cache = get_llm_cache()
+                key = cache_key(agent, task, options)
+                cached = cache.get(key)
+                if cached is not None:
+                    self.log("[CACHE] Reusing stored response")
+                    record["cache_hit"] = True
+                    run.publish(CACHE_HIT, stage, key=key)
+                    emit(cached)
+                    return cached
+            
+            record["model"] = getattr(agent.llm, "model", None)
+            # A request's calls share a route key, so with several servers they reuse one prompt cache
+            route = (id(run), (self.sampling or {}).get("seed"))
+            priority = self.priority or priority_of(run.mode)
+            with streaming(emit, self.cancel_event, run.usage_recorder(record), options, until, route,
+                           priority, self.user):
+                if self.backend == "crewai":
+                    output = run_crewai(agent, task)
+                else:
+                    self.log(f"[{stage}] {agent.role}")
+                    output = run_direct(agent, task)
+            
+            if self.use_cache:
+                cache.put(key, output)
+            return output
+    
+    def run_agent(self, kind, build_task, stage, model=None, **options):
+        """Run a stage on agent `kind` with the task build_task(agent) returns.
+        
+        In cascade mode the stage first runs on the small model; its output
+        is kept if the stage's check in src.cascade accepts it, otherwise the
+        stage is repeated on the agent's own model. An explicit model skips
+        the cascade.
+        """
+        agent = get_agent(kind, verbose=self.verbose, model=model)
+        if self.cascade_model and model is None and self.cascade_model != getattr(agent.llm, "model", None):
+            small = get_agent(kind, verbose=self.verbose, model=self.cascade_model)
+            output = self.run_crew(small, build_task(small), stage=stage, **options)
+            if ACCEPT[kind](output):
+                return output
+            large = getattr(agent.llm, "model", None)
+            self.log(f"[CASCADE] {stage}: {self.cascade_model} output rejected, escalating to {large}")
+            active_run().publish(CASCADE_ESCALATED, stage, small=self.cascade_model, large=large)
+        return self.run_crew(agent, build_task(agent), stage=stage, **options)
+    
+    def recall(self, query, confirm=True):
+        """Look up the closest verified past query.
+        
+        Returns (result, draft): a near-duplicate's result to return as is, or
+        a warm-start context for the developer built from a similar one.
+        A stored result is only reused as is for the same normalized query, or
+        (with confirm) a near-duplicate whose code passes tests written for this query.
+        """
+        if not self.use_index:
+            return None, ""
+        with active_run().stage("recall"):
+            match = get_query_index().lookup(query, QUERY_WARM_START_THRESHOLD)
+        if match is None:
+            return None, ""
+        similar = {"query": match["query"], "similarity": match["similarity"]}
+        if match["exact"]:
+            self.log(f"\n[REUSE] Verified result of the same query: {match['query']}")
+            return {**match["result"], "query": query, "reused_from": similar}, ""
+        if confirm and match["similarity"] >= QUERY_REUSE_THRESHOLD:
+            confirmed = self.confirm_reuse(match["result"]["code"], query)
+            if confirmed:
+                scenarios, results = confirmed
+                self.log(f"\n[REUSE] Verified result of a near-duplicate query ({match['similarity']}),"
+                         f" passes this query's tests: {match['query']}")
+                return {**match["result"], "query": query, "scenarios": scenarios, "results": results,
+                        "reused_from": similar}, ""
+        self.log(f"\n[WARM START] Drafting from a similar verified result ({match['containment']}): {match['query']}")
+        draft = (f"A verified solution to a similar request (\"{match['query']}\"):\n"
+                 f"```python\n{match['result']['code']}\n```\nAdapt it to this requirement.")
+        return None, draft
+    
+    def confirm_reuse(self, code, query):
+        """Run tests written for query against a stored solution; (scenarios, report) if all pass"""
+        scenarios = self.generate_scenarios(code, query)
+        with active_run().stage("tests"):
+            report, _ = execute_tests(code, scenarios)
+        if report is None or "ALL_PASSED" not in report.upper():
+            return None
+        return scenarios, report
+    
+    def remember(self, query, result):
+        """Add a freshly verified result to the near-duplicate index; returns the result"""
+        if self.use_index and result["status"] == "VERIFIED_PASSED" and "reused_from" not in result:
+            get_query_index().add(query, result)
+        return result
     
     def extract_code(self, text):
         """Pull code out of markdown blocks"""
-        match = re.search(r'```python\s*(.*?)\s*```', text, re.DOTALL)
-        if match:
-            return match.group(1).strip()
-        match = re.search(r'```\s*(.*?)\s*```', text, re.DOTALL)
-        if match:
-            return match.group(1).strip()
-        return text
+        return extract_code(text)
+    
+    def generate_code(self, query, context=""):
+        """Developer stage: returns extracted code"""
+        build = lambda dev: create_code_generation_task(query, context, agent=dev)
+        if self.early_stop:
+            # Ends at the close of the python block; other blocks' fences don't count
+            output = self.run_agent("developer", build, "generate", until=lambda: CodeFenceExtractor().feed)
+        else:
+            output = self.run_agent("developer", build, "generate")
+        code = self.extract_code(output)
+        active_run().add_code("generate", code)
+        return code
+    
+    def check_code(self, code):
+        """Static gate: parse, compile and lint locally (milliseconds, no LLM)"""
+        with active_run().stage("static_check"):
+            return check_code(code)
+    
+    def generate_checked_code(self, query, context=""):
+        """Generate code, regenerating with the exact errors (added to context) while it fails the static gate.
+        
+        Returns (code, verdict); verdict["attempts"] counts generations and
+        verdict["duration"] is the total time spent in the checks.
+        """
+        code = self.generate_code(query, context)
+        verdict = self.check_code(code)
+        attempts, checked = 1, verdict["duration"]
+        while not verdict["ok"] and attempts <= STATIC_GATE_RETRIES:
+            problems = format_errors(verdict)
+            self.log(f"\n[GATE] Static checks failed, regenerating:\n{problems}")
+            retry = (f"Your previous code failed static checks:\n{problems}\n\n"
+                     f"Previous code:\n```python\n{code}\n```\n")
+            if context:
+                # The original ask (failing tests, a draft to adapt) still stands
+                retry = f"{context}\n\n{retry}Fix these problems as well."
+            else:
+                retry += "Fix exactly these problems."
+            code = self.generate_code(query, retry)
+            verdict = self.check_code(code)
+            attempts += 1
+            checked += verdict["duration"]
+        verdict["attempts"] = attempts
+        verdict["duration"] = round(checked, 4)
+        return code, verdict
+    
+    def static_failure(self, query, code, verdict, **extra):
+        """Result for code that still fails the gate - no point paying for LLM review"""
+        self.log("\n[GATE] Code still fails static checks, skipping the remaining stages")
+        return {
+            "query": query,
+            "code": code,
+            **extra,
+            "static_check": verdict,
+            "status": "STATIC_CHECK_FAILED"
+        }
+    
+    def run_qa(self, code, query):
+        """QA stage: returns the QA agent's feedback"""
+        return self.run_agent("qa", lambda qa: create_debugging_task(code, query, agent=qa), "qa")
+    
+    def run_review(self, code, query, feedback="", model=None):
+        """Reviewer stage: returns the review with its decision"""
+        return self.run_agent(
+            "reviewer", lambda reviewer: create_validation_task(code, query, feedback, agent=reviewer),
+            "review", model=model)
+    
+    def generate_scenarios(self, code, query):
+        """Use case stage: returns the raw JSON test scenarios"""
+        return self.run_agent("usecase", lambda usecase: create_usecase_task(code, query, agent=usecase),
+                              "scenarios")
     
+    @instrumented("standard")
     def process_request(self, query):
         """Standard flow: generate -> debug -> validate"""
         self.log(f"\n{'='*50}\nProcessing: {query}\n{'='*50}")
+        reused, draft = self.recall(query)
+        if reused:
+            return reused
         
-        # Step 1: Generate code
+        # Step 1: Generate code and gate it with local static checks
         self.log("\n[1] Generating code...")
-        dev = create_developer_agent(verbose=self.verbose)
-        task = create_code_generation_task(query)
-        code = self.extract_code(self.run_crew(dev, task))
+        code, gate = self.generate_checked_code(query, draft)
+        if not gate["ok"]:
+            return self.static_failure(query, code, gate)
         
         # Step 2: Debug/QA
         self.log("\n[2] Running QA...")
-        qa = create_qa_agent(verbose=self.verbose)
-        task = create_debugging_task(code, query)
-        feedback = self.run_crew(qa, task)
+        feedback = self.run_qa(code, query)
         
-        # Step 3: Review
-        self.log("\n[3] Reviewing...")
-        reviewer = create_reviewer_agent(verbose=self.verbose)
-        task = create_validation_task(code, query, feedback)
-        review = self.run_crew(reviewer, task)
+        # Step 3: Review, unless the cheap evidence already clears the threshold
+        confidence = self.score(code, gate, feedback)
+        if not confidence["confident"]:
+            self.log("\n[3] Reviewing...")
+            review = self.run_review(code, query, feedback)
+        elif REVIEW_LIGHT_MODEL:
+            confidence["review"] = f"light:{REVIEW_LIGHT_MODEL}"
+            self.log(f"\n[3] Confidence {confidence['score']}, light review with {REVIEW_LIGHT_MODEL}...")
+            review = self.run_review(code, query, feedback, model=REVIEW_LIGHT_MODEL)
+        else:
+            confidence["review"] = "skipped"
+            self.log(f"\n[3] Confidence {confidence['score']} >= {confidence['threshold']}, review skipped")
+            review = None
         
         self.log("\n[DONE]")
         return {
@@ -76,51 +324,119 @@ class CodeCrewOrchestrator:
             "code": code,
             "feedback": feedback,
             "review": review,
+            "static_check": gate,
+            "confidence": confidence,
             "status": "completed"
         }
     
+    def score(self, code, gate, feedback):
+        """Confidence step: static verdict + QA bug count + a sandboxed run of the program"""
+        with active_run().stage("confidence"):
+            execution = run_program(code)
+            confidence = score_confidence(gate, feedback, execution)
+        confidence["review"] = "full"
+        return confidence
+    
+    def run_tests(self, code, scenarios, query=""):
+        """Execute scenarios locally; fall back to the testing agent if they don't parse"""
+        with active_run().stage("tests"):
+            report, _ = execute_tests(code, scenarios)
+        if report is not None:
+            return report
+        self.log("[WARN] Could not parse test scenarios, asking the testing agent")
+        return self.run_agent(
+            "testing", lambda tester: create_testing_task(code, scenarios, agent=tester, user_query=query),
+            "tests_agent")
+    
+    @staticmethod
+    def tested_signatures(code, cases):
+        """Signatures of the functions the scenarios call (all of them if none parsed)"""
+        signatures = function_signatures(code)
+        if not cases:
+            return signatures
+        return {c["function"]: signatures.get(c["function"]) for c in cases}
+    
+    def retest(self, code, cases, outcomes, iteration):
+        """Run every scenario the first time; afterwards only the failing ones plus a
+        rotating regression sample of passing ones. Returns outcomes by scenario index.
+        """
+        if outcomes:
+            failing = [n for n, r in outcomes.items() if not r["passed"]]
+            passing = [n for n, r in outcomes.items() if r["passed"]]
+            sample = min(TEST_REGRESSION_SAMPLE, len(passing))
+            offset = iteration * sample
+            selected = failing + [passing[(offset + k) % len(passing)] for k in range(sample)]
+        else:
+            selected = list(range(len(cases)))
+        with active_run().stage("tests") as record:
+            record["scenarios_run"] = len(selected)
+            results = run_scenarios(code, [cases[n] for n in selected])
+        return {**outcomes, **dict(zip(selected, results))}
+    
+    @instrumented("verified")
     def process_request_verified(self, query):
-        """Verified flow: generate -> use case agent -> testing agent"""
+        """Verified flow: generate -> use case agent -> sandboxed test run -> targeted repair"""
         self.log(f"\n{'='*50}\nVerified Processing: {query}\n{'='*50}")
+        reused, draft = self.recall(query)
+        if reused:
+            return reused
         
-        # Step 1: Generate code
+        # Step 1: Generate code and gate it with local static checks
         self.log("\n[1] Generating code...")
-        dev = create_developer_agent(verbose=self.verbose)
-        task = create_code_generation_task(query)
-        code = self.extract_code(self.run_crew(dev, task))
+        code, gate = self.generate_checked_code(query, draft)
+        if not gate["ok"]:
+            return self.static_failure(query, code, gate)
+        
+        # Step 2: Use Case Agent generates test scenarios once; they stay
+        # pinned across repairs unless the functions they call change shape
+        self.log("\n[2] Generating test scenarios...")
+        scenarios = self.generate_scenarios(code, query)
+        cases = parse_scenarios(scenarios)
+        signatures = self.tested_signatures(code, cases)
+        outcomes = {}
         
         for i in range(self.max_iterations):
             self.log(f"\n--- Iteration {i+1} ---")
+            current_run.get().set_iteration(i + 1)
             
-            # Step 2: Use Case Agent generates test scenarios
-            self.log("\n[2] Generating test scenarios...")
-            usecase = create_usecase_agent(verbose=self.verbose)
-            task = create_usecase_task(code, query)
-            scenarios = self.run_crew(usecase, task)
+            if i and self.tested_signatures(code, cases) != signatures:
+                self.log("\n[2] Function signatures changed, regenerating test scenarios...")
+                scenarios = self.generate_scenarios(code, query)
+                cases = parse_scenarios(scenarios)
+                signatures = self.tested_signatures(code, cases)
+                outcomes = {}
             
-            # Step 3: Testing Agent runs the tests
+            # Step 3: Execute the scenarios against the code
             self.log("\n[3] Running tests...")
-            tester = create_testing_agent(verbose=self.verbose)
-            task = create_testing_task(code, scenarios)
-            results = self.run_crew(tester, task)
+            if cases:
+                outcomes = self.retest(code, cases, outcomes, i)
+                ordered = [outcomes[n] for n in range(len(cases))]
+                results = format_report(ordered)
+                failures = format_failures(ordered)
+            else:
+                results = self.run_tests(code, scenarios, query)
+                failures = summarize_feedback(results)
             
             # Check results
             if "ALL_PASSED" in results.upper():
                 self.log("\n[OK] All tests passed!")
-                return {
+                return self.remember(query, {
                     "query": query,
                     "code": code,
                     "scenarios": scenarios,
                     "results": results,
+                    "static_check": gate,
                     "status": "VERIFIED_PASSED"
-                }
+                })
             
             if i < self.max_iterations - 1:
-                self.log("\n[WARN] Tests failed, regenerating...")
-                task = create_code_generation_task(
-                    f"{query}\n\nFix these issues:\n{results}"
-                )
-                code = self.extract_code(self.run_crew(dev, task))
+                self.log("\n[WARN] Tests failed, repairing...")
+                context = (f"Your code fails these test cases:\n{failures}\n\n"
+                           f"Current code:\n```python\n{code}\n```\n"
+                           "Fix these failures and keep everything else unchanged.")
+                code, gate = self.generate_checked_code(query, context)
+                if not gate["ok"]:
+                    return self.static_failure(query, code, gate, scenarios=scenarios, results=results)
         
         self.log("\n[DONE] Max iterations reached")
         return {
@@ -128,15 +444,230 @@ class CodeCrewOrchestrator:
             "code": code,
             "scenarios": scenarios,
             "results": results,
+            "static_check": gate,
             "status": "TESTS_FAILED"
         }
     
+    @instrumented("fast")
     def process_request_fast(self, query):
         """Fast mode: just generate, no QA"""
         self.log(f"\n[FAST] Generating: {query}")
+        reused, _ = self.recall(query, confirm=False)  # No test run to confirm a near-duplicate
+        if reused:
+            return reused
+        
+        code = self.generate_code(query)
+        
+        # Report the gate's verdict, but fast mode never pays for a regeneration
+        return {"query": query, "code": code, "static_check": self.check_code(code), "status": "generated"}
+    
+    def candidate(self, index):
+        """Worker for speculative candidate `index`: a shallow copy with its own
+        cancel flag (also set by this orchestrator's) and, past the first, a
+        different seed and temperature
+        """
+        worker = copy.copy(self)
+        worker.cancel_event = ChainedEvent(self.cancel_event)
+        if index:
+            worker.sampling = {
+                "seed": index,
+                "temperature": round(TEMPERATURE + index * SPECULATIVE_TEMPERATURE_STEP, 2),
+            }
+        if self.on_token:
+            worker.on_token = lambda stage, text: self.on_token(f"{stage}#{index + 1}", text)
+        return worker
+    
+    @instrumented("speculative")
+    def process_request_speculative(self, query, candidates=None):
+        """Speculative flow: N concurrent generations, tested as they arrive; the
+        first candidate to pass every scenario wins and the rest are cancelled
+        """
+        n = candidates or SPECULATIVE_CANDIDATES
+        self.log(f"\n{'='*50}\nSpeculative Processing ({n} candidates): {query}\n{'='*50}")
+        reused, _ = self.recall(query)
+        if reused:
+            return reused
+        
+        def generate(worker):
+            code = worker.generate_code(query)
+            return code, worker.check_code(code)
+        
+        workers = [self.candidate(i) for i in range(n)]
+        pool = ThreadPoolExecutor(max_workers=n)
+        futures = {
+            pool.submit(contextvars.copy_context().run, generate, worker): index
+            for index, worker in enumerate(workers)
+        }
+        scenarios, cases = None, []
+        best = None  # (passed, index, code, gate, results)
+        evaluated, error = 0, None
+        try:
+            for future in as_completed(futures):
+                if self.cancel_event.is_set():
+                    raise GenerationCancelled()
+                index = futures[future]
+                try:
+                    code, gate = future.result()
+                except Exception as e:  # One failed candidate shouldn't sink the others
+                    self.log(f"\n[#{index + 1}] Generation failed: {e}")
+                    error = e
+                    continue
+                evaluated += 1
+                if not gate["ok"]:
+                    self.log(f"\n[#{index + 1}] Failed static checks")
+                    best = best or (-1, index, code, gate, None)
+                    continue
+                
+                # Scenarios come from the first valid candidate and are shared by all
+                if scenarios is None:
+                    self.log(f"\n[#{index + 1}] Generating test scenarios...")
+                    scenarios = self.generate_scenarios(code, query)
+                    cases = parse_scenarios(scenarios)
+                
+                self.log(f"\n[#{index + 1}] Running tests...")
+                if cases:
+                    with active_run().stage("tests"):
+                        outcomes = run_scenarios(code, cases)
+                    results = format_report(outcomes)
+                    passed = sum(1 for r in outcomes if r["passed"])
+                else:
+                    results = self.run_tests(code, scenarios, query)
+                    passed = 0
+                
+                if "ALL_PASSED" in results.upper():
+                    self.log(f"\n[OK] Candidate #{index + 1} passed, cancelling the rest")
+                    best = (passed, index, code, gate, results)
+                    break
+                if best is None or passed > best[0]:
+                    best = (passed, index, code, gate, results)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+        
+        if best is None:
+            raise error
+        _, index, code, gate, results = best
+        speculation = {
+            "candidates": n,
+            "evaluated": evaluated,
+            "winner": index + 1,
+            "sampling": workers[index].sampling,
+        }
+        if not gate["ok"]:
+            return self.static_failure(query, code, gate, speculative=speculation)
+        return self.remember(query, {
+            "query": query,
+            "code": code,
+            "scenarios": scenarios,
+            "results": results,
+            "static_check": gate,
+            "speculative": speculation,
+            "status": "VERIFIED_PASSED" if "ALL_PASSED" in results.upper() else "TESTS_FAILED"
+        })
+    
+    def combined_pipeline(self):
+        """(QA -> review) alongside (scenarios -> tests), given checked code"""
+        return Pipeline([
+            Stage("feedback", self.run_qa, deps=["code", "query"]),
+            Stage("scenarios", self.generate_scenarios, deps=["code", "query"]),
+            Stage("results", self.run_tests, deps=["code", "scenarios", "query"]),
+            Stage("review", self.run_review, deps=["code", "query", "feedback"]),
+        ])
+    
+    @instrumented("combined")
+    async def process_request_combined_async(self, query):
+        """QA + tests flow: QA/review and scenario generation/testing run concurrently"""
+        self.log(f"\n{'='*50}\nCombined Processing: {query}\n{'='*50}")
+        reused, draft = self.recall(query)
+        if reused:
+            return reused
+        
+        code, gate = await asyncio.to_thread(self.generate_checked_code, query, draft)
+        if not gate["ok"]:
+            return self.static_failure(query, code, gate)
+        
+        results = await self.combined_pipeline().run(query=query, code=code)
+        
+        passed = "ALL_PASSED" in results["results"].upper()
+        self.log("\n[OK] All tests passed!" if passed else "\n[WARN] Some tests failed")
+        return self.remember(query, {
+            "query": query,
+            "code": results["code"],
+            "feedback": results["feedback"],
+            "review": results["review"],
+            "scenarios": results["scenarios"],
+            "results": results["results"],
+            "static_check": gate,
+            "status": "VERIFIED_PASSED" if passed else "TESTS_FAILED"
+        })
+    
+    def process_request_combined(self, query):
+        """Blocking wrapper around process_request_combined_async"""
+        return asyncio.run(self.process_request_combined_async(query))
+    
+    def process(self, query, mode="standard", **options):
+        """Run query in mode (fast, standard, verified, combined, speculative).
+        
+        With self.deadline set, a mode estimated to miss it falls back to a
+        cheaper one (verified -> standard -> fast; the result then has
+        "downgraded_from"), and DeadlineMissed is raised if even fast would.
+        The LLM calls keep the priority of the requested mode, and options the
+        fallback does not take (e.g. speculative candidates) are dropped.
+        """
+        admission = get_admission()
+        admitted = mode
+        if self.deadline:
+            admitted = admission.admit(mode, self.deadline, self.priority)
+            if admitted != mode:
+                self.log(f"[DEADLINE] {mode} would take over {self.deadline:g}s, running {admitted}")
+        run = {
+            "fast": self.process_request_fast,
+            "verified": self.process_request_verified,
+            "combined": self.process_request_combined,
+            "speculative": self.process_request_speculative,
+        }.get(admitted, self.process_request)
+        if admitted != mode:
+            accepted = inspect.signature(run).parameters
+            options = {k: v for k, v in options.items() if k in accepted}
+        
+        priority = self.priority
+        self.priority = priority or priority_of(mode)
+        try:
+            started = time.perf_counter()
+            result = run(query, **options)
+            admission.observe(admitted, time.perf_counter() - started)
+        finally:
+            self.priority = priority
+        if admitted != mode:
+            result["downgraded_from"] = mode
+        return result
+    
+    async def stream_request(self, query, mode="standard"):
+        """Async iterator over {"stage", "token"} events, ending with {"result"}.
+        
+        Closing the iterator early cancels the generation in progress.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        
+        def on_token(stage, text):
+            loop.call_soon_threadsafe(queue.put_nowait, {"stage": stage, "token": text})
         
-        dev = create_developer_agent(verbose=self.verbose)
-        task = create_code_generation_task(query)
-        code = self.extract_code(self.run_crew(dev, task))
+        # A shallow copy shares all settings but gets its own sink and cancel flag
+        worker = copy.copy(self)
+        worker.on_token = on_token
+        worker.cancel_event = threading.Event()
         
-        return {"query": query, "code": code, "status": "generated"}
\ No newline at end of file
+        job = asyncio.ensure_future(asyncio.to_thread(worker.process, query, mode))
+        job.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+            yield {"result": job.result()}
+        finally:
+            worker.cancel()
+            job.cancel()
\ No newline at end of file
@@ -0,0 +1,231 @@
+"""Metrics - per-stage latency, token and throughput records for a pipeline run"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from src.events import RUN_STARTED, RUN_FINISHED, STAGE_STARTED, STAGE_FINISHED, ITERATION, ERROR
+
+
+current_run = ContextVar("current_run", default=None)
+
+
+class RunMetrics:
+    """Collects one record per stage of a single request and publishes progress events"""
+
+    def __init__(self, query, mode, events=None):
+        self.query = query
+        self.mode = mode
+        self.events = events  # EventBus, or None
+        self.iteration = 1
+        self.stages = []
+        self.code_versions = []  # {"iteration", "stage", "code"} for every generation
+        self.start = time.time()
+        self.end = None
+        self._lock = threading.Lock()
+
+    def publish(self, kind, stage=None, **data):
+        """Publish an event tagged with this run's query, mode and iteration"""
+        if self.events:
+            self.events.publish(kind, query=self.query, mode=self.mode, stage=stage,
+                                iteration=self.iteration, data=data)
+
+    def set_iteration(self, iteration):
+        self.iteration = iteration
+        self.publish(ITERATION)
+
+    @contextmanager
+    def stage(self, name):
+        """Time a stage; the yielded record is filled in by the LLM callbacks"""
+        record = {
+            "stage": name,
+            "iteration": self.iteration,
+            "start": time.time(),
+            "wall_time": None,
+            "ttft": None,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "tokens_per_sec": None,
+            "llm_calls": 0,
+            "cache_hit": False,
+            "early_stop": False,  # Generation cut off once its output was complete
+            "thread": threading.get_ident(),
+            "prefill_seconds": 0.0,  # Prompt processing time reported by the server
+            "_eval_seconds": 0.0,
+        }
+        started = time.perf_counter()
+        self.publish(STAGE_STARTED, name)
+        try:
+            yield record
+        except BaseException as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            self.publish(ERROR, name, error=record["error"])
+            raise
+        finally:
+            record["wall_time"] = round(time.perf_counter() - started, 4)
+            if record["_eval_seconds"]:
+                record["tokens_per_sec"] = round(
+                    record["completion_tokens"] / record["_eval_seconds"], 2)
+            elif record["completion_tokens"] and record["ttft"] is not None:
+                gen_time = record["wall_time"] - record["ttft"]
+                if gen_time > 0:
+                    record["tokens_per_sec"] = round(record["completion_tokens"] / gen_time, 2)
+            del record["_eval_seconds"]
+            with self._lock:
+                self.stages.append(record)
+            self.publish(STAGE_FINISHED, name,
+                         **{k: v for k, v in record.items() if k not in ("stage", "thread")})
+
+    def add_code(self, stage, code):
+        """Keep a generated version of the code for the run history"""
+        with self._lock:
+            self.code_versions.append({"iteration": self.iteration, "stage": stage, "code": code})
+
+    @staticmethod
+    def token_timer(record, started):
+        """on_token hook that stamps time-to-first-token on the record"""
+        def on_token(_text):
+            if record["ttft"] is None:
+                record["ttft"] = round(time.perf_counter() - started, 4)
+        return on_token
+
+    @staticmethod
+    def usage_recorder(record):
+        """on_usage hook that adds Ollama's final-chunk counters to the record"""
+        def on_usage(reply):
+            record["llm_calls"] += 1
+            record["prompt_tokens"] += reply.get("prompt_eval_count") or 0
+            record["completion_tokens"] += reply.get("eval_count") or 0
+            record["_eval_seconds"] += (reply.get("eval_duration") or 0) / 1e9
+            record["prefill_seconds"] = round(
+                record["prefill_seconds"] + (reply.get("prompt_eval_duration") or 0) / 1e9, 4)
+            if reply.get("done_reason") == "early_stop":
+                record["early_stop"] = True
+            if reply.get("node"):
+                record["node"] = reply["node"]  # Which server answered, with several
+        return on_usage
+
+    def finish(self):
+        self.end = time.time()
+
+    def summary(self):
+        """Metadata block attached to every result"""
+        end = self.end or time.time()
+        stages = sorted(self.stages, key=lambda r: r["start"])
+        return {
+            "mode": self.mode,
+            "start_time": datetime.fromtimestamp(self.start).isoformat(timespec="seconds"),
+            "end_time": datetime.fromtimestamp(end).isoformat(timespec="seconds"),
+            "duration": round(end - self.start, 3),
+            "total_iterations": max([r["iteration"] for r in stages] or [1]),
+            "llm_calls": sum(r["llm_calls"] for r in stages),
+            "cache_hits": sum(1 for r in stages if r["cache_hit"]),
+            "prompt_tokens": sum(r["prompt_tokens"] for r in stages),
+            "completion_tokens": sum(r["completion_tokens"] for r in stages),
+            "stages": [{k: v for k, v in r.items() if k != "thread"} for r in stages],
+        }
+
+    def write_jsonl(self, path):
+        """Append one JSON line per stage"""
+        with open(path, "a", encoding="utf-8") as f:
+            for r in sorted(self.stages, key=lambda r: r["start"]):
+                line = {"query": self.query, "mode": self.mode,
+                        **{k: v for k, v in r.items() if k != "thread"}}
+                f.write(json.dumps(line) + "\n")
+
+    def write_chrome_trace(self, path):
+        """Write a trace viewable in chrome://tracing or Perfetto"""
+        threads = {}
+        events = []
+        for r in self.stages:
+            tid = threads.setdefault(r["thread"], len(threads) + 1)
+            args = {k: v for k, v in r.items() if k not in ("stage", "start", "thread")}
+            events.append({
+                "name": r["stage"], "cat": self.mode, "ph": "X", "pid": 1, "tid": tid,
+                "ts": int((r["start"] - self.start) * 1e6),
+                "dur": int((r["wall_time"] or 0) * 1e6),
+                "args": args,
+            })
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "otherData": {"query": self.query}}, f)
+
+
+def active_run():
+    """The current request's metrics, or a throwaway collector outside a request"""
+    return current_run.get() or RunMetrics(None, None)
+
+
+def instrumented(mode):
+    """Decorator for process_* methods: collects metrics and attaches them as result["metadata"].
+
+    The finished result is also exported to self.metrics_path / self.trace_path
+    and recorded in self.history when those are set. Nested calls (e.g. a
+    sync wrapper around the async flow) share the outer run.
+    """
+    def decorate(method):
+        def begin(self, query):
+            run = RunMetrics(query, mode, getattr(self, "events", None))
+            run.publish(RUN_STARTED)
+            return run, current_run.set(run)
+
+        def fail(run, error):
+            run.finish()
+            run.publish(ERROR, error=f"{type(error).__name__}: {error}")
+            run.publish(RUN_FINISHED, status="error", duration=round(run.end - run.start, 3))
+
+        def end(self, run, result):
+            run.finish()
+            result["metadata"] = run.summary()
+            if self.metrics_path:
+                run.write_jsonl(self.metrics_path)
+            if self.trace_path:
+                run.write_chrome_trace(_trace_file(self.trace_path, run))
+            if self.history is not None:
+                result["run_id"] = self.history.record(result, run.code_versions)
+            run.publish(RUN_FINISHED, status=result.get("status"), run_id=result.get("run_id"),
+                        duration=result["metadata"]["duration"])
+            return result
+
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def wrapper(self, query, *args, **kwargs):
+                if current_run.get() is not None:
+                    return await method(self, query, *args, **kwargs)
+                run, token = begin(self, query)
+                try:
+                    result = await method(self, query, *args, **kwargs)
+                except BaseException as e:
+                    fail(run, e)
+                    raise
+                finally:
+                    current_run.reset(token)
+                return end(self, run, result)
+        else:
+            @functools.wraps(method)
+            def wrapper(self, query, *args, **kwargs):
+                if current_run.get() is not None:
+                    return method(self, query, *args, **kwargs)
+                run, token = begin(self, query)
+                try:
+                    result = method(self, query, *args, **kwargs)
+                except BaseException as e:
+                    fail(run, e)
+                    raise
+                finally:
+                    current_run.reset(token)
+                return end(self, run, result)
+        return wrapper
+    return decorate
+
+
+def _trace_file(path, run):
+    """A directory gets one trace file per run; a file path is overwritten"""
+    if os.path.isdir(path):
+        stamp = datetime.fromtimestamp(run.start).strftime("%Y%m%d_%H%M%S_%f")
+        return os.path.join(path, f"trace_{run.mode}_{stamp}.json")
+    return path
@@ -0,0 +1,62 @@
+"""Pipeline - runs stages as a dependency graph, starting each one as soon as its inputs exist"""
+import asyncio
+
+
+class Stage:
+    """A named step with the names of the stages (or inputs) it depends on.
+
+    `run` is a plain blocking function that receives the results gathered so
+    far as keyword arguments; it is executed in a worker thread.
+    """
+
+    def __init__(self, name, run, deps=()):
+        self.name = name
+        self.run = run
+        self.deps = tuple(deps)
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, deps={self.deps!r})"
+
+
+class Pipeline:
+    """A DAG of stages; independent stages run concurrently"""
+
+    def __init__(self, stages):
+        self.stages = {s.name: s for s in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Duplicate stage names")
+
+    def _check(self, inputs):
+        """Fail fast on missing dependencies or cycles"""
+        known = set(inputs)
+        remaining = dict(self.stages)
+        while remaining:
+            ready = [n for n, s in remaining.items() if set(s.deps) <= known]
+            if not ready:
+                raise ValueError(f"Unsatisfiable or cyclic dependencies: {list(remaining.values())}")
+            for name in ready:
+                known.add(name)
+                del remaining[name]
+
+    async def run(self, **inputs):
+        """Run every stage and return a dict of inputs plus stage results"""
+        self._check(inputs)
+        results = dict(inputs)
+        pending = dict(self.stages)
+        running = {}
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(d in results for d in stage.deps):
+                        del pending[name]
+                        kwargs = {d: results[d] for d in stage.deps}
+                        task = asyncio.create_task(asyncio.to_thread(stage.run, **kwargs))
+                        running[task] = stage
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = running.pop(task)
+                    results[stage.name] = task.result()
+        finally:
+            for task in running:
+                task.cancel()
+        return results
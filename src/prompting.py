@@ -0,0 +1,239 @@
+"""Prompting - token counting, feedback trimming and context-budget enforcement for prompts"""
+import logging
+import re
+
+from src.config import CONTEXT_WINDOW, MAX_TOKENS, PROMPT_FEEDBACK_LINES
+
+
+logger = logging.getLogger(__name__)
+
+# Words split into <=4 character pieces plus single punctuation marks: within
+# ~10% of llama BPE counts for English and Python, with no tokenizer download
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+_ACTIONABLE = re.compile(
+    r"\b(bugs?|errors?|exceptions?|fail(?:s|ed|ure)?|fix(?:es|ed)?|issues?|incorrect|wrong|"
+    r"missing|should|must|crash(?:es)?|raises?|invalid|line \d+|decision|needs_revision|"
+    r"summary|status)\b",
+    re.IGNORECASE,
+)
+_LIST_ITEM = re.compile(r"^(?:[-*•]|\d+[.)]|\[FAIL\])\s*")
+
+# Prompt text CrewAI adds around a task description (agent framing, scaffolding)
+PROMPT_OVERHEAD = 300
+CONTEXT_MARGIN = 1.1  # count_tokens is an estimate; leave room for the real tokenizer
+
+# Sections cut first, in this order, when a prompt is over budget: they repeat
+# what earlier stages said, while the code and the instructions are needed whole
+TRIMMABLE_SECTIONS = ("PREVIOUS FEEDBACK:", "CONTEXT FROM PREVIOUS ATTEMPTS:")
+_HEADER = re.compile(r"^[A-Z][A-Z0-9 ,()/_-]*:")
+_TRIM_NOTE = "[... {} lines trimmed to fit the context window ...]"
+KEEP_FINDINGS = 3  # First lines of a trimmed section that stay, so a repair still knows what to fix
+
+# Stages that work on existing code start with the same framing, requirement and
+# code, and only then their own instructions (after STAGE_MARKER), so the server
+# can reuse the prompt's KV cache from one stage to the next
+SHARED_FRAMING = "A team of agents is working on one Python program. Here is what it must do and its current code."
+STAGE_MARKER = "YOUR TASK:"
+
+
+def count_tokens(text):
+    """Approximate token count of text"""
+    return len(_TOKEN_RE.findall(text))
+
+
+def prompt_budget(num_predict=None, overhead=0):
+    """Tokens a prompt may take so that it, `overhead` tokens of framing added
+    later and num_predict tokens of output fit the largest context the runtime
+    requests (CONTEXT_WINDOW; see LLMRuntime.context_size)
+    """
+    return int((CONTEXT_WINDOW - (num_predict or MAX_TOKENS)) / CONTEXT_MARGIN) - overhead
+
+
+def shared_prefix(user_query, code):
+    """Canonical start of every prompt about a piece of code"""
+    return f"{SHARED_FRAMING}\n\nREQUIREMENT:\n{user_query.strip()}\n\nCODE:\n```python\n{code.strip()}\n```\n"
+
+
+def stage_prompt(user_query, code, instructions):
+    """shared_prefix() followed by a stage's own instructions"""
+    return f"{shared_prefix(user_query, code)}\n{STAGE_MARKER}\n{instructions.strip()}\n"
+
+
+def _normalize(line):
+    return " ".join(_LIST_ITEM.sub("", line.strip()).lower().split())
+
+
+def summarize_feedback(text, max_lines=None):
+    """Cut free-form agent feedback down to its actionable lines.
+
+    Drops code blocks (QA output repeats the whole program), passing test
+    lines, prose and duplicates; keeps failures, bullet points and lines that
+    mention bugs, errors, fixes or decisions.
+    """
+    max_lines = max_lines or PROMPT_FEEDBACK_LINES
+    kept, prose, seen = [], [], set()
+    in_code = False
+    for raw in text.splitlines():
+        line = raw.strip()
+        if line.startswith("```"):
+            in_code = not in_code
+            continue
+        if in_code or not line or line.startswith("[PASS]"):
+            continue
+        key = _normalize(line)
+        if key in seen:
+            continue
+        seen.add(key)
+        if _LIST_ITEM.match(line) or _ACTIONABLE.search(line):
+            kept.append(line)
+        else:
+            prose.append(line)
+
+    lines = kept or prose  # Nothing looked actionable: fall back to the prose
+    if len(lines) > max_lines:
+        lines = lines[:max_lines] + [f"... ({len(lines) - max_lines} more)"]
+    return "\n".join(lines)
+
+
+def dedupe_lines(text):
+    """Drop repeated instruction lines, leaving code blocks and short headers alone"""
+    out, seen = [], set()
+    in_code = False
+    for line in text.splitlines():
+        if line.strip().startswith("```"):
+            in_code = not in_code
+            out.append(line)
+            continue
+        key = _normalize(line)
+        if not in_code and len(key) >= 20:
+            if key in seen:
+                continue
+            seen.add(key)
+        out.append(line)
+    return "\n".join(out)
+
+
+def _code_lines(lines):
+    """Indices of the lines inside code blocks, fences included"""
+    inside, in_code = set(), False
+    for i, line in enumerate(lines):
+        fence = line.strip().startswith("```")
+        if in_code or fence:
+            inside.add(i)
+        if fence:
+            in_code = not in_code
+    return inside
+
+
+def _section(lines, header):
+    """(start, end) line range of a section: from its header line to the next
+    header that follows a blank line outside code blocks; None if absent
+    """
+    start = next((i for i, line in enumerate(lines) if line.strip() == header), None)
+    if start is None:
+        return None
+    code = _code_lines(lines)
+    for i in range(start + 1, len(lines)):
+        if i not in code and not lines[i - 1].strip() and _HEADER.match(lines[i]):
+            return start, i
+    return start, len(lines)
+
+
+def _trim_section(lines, header, excess):
+    """Drop a section's findings and prose, last first, until it is `excess`
+    tokens shorter. The first KEEP_FINDINGS lines, code blocks, the lines
+    introducing them ("Current code:") and the instructions after the last one
+    stay.
+    """
+    span = _section(lines, header)
+    if span is None:
+        return lines, excess
+    start, end = span
+    body = lines[start + 1:end]
+    code = _code_lines(body)
+    last_code = max(code, default=len(body))
+    removable = [i for i, line in enumerate(body) if i not in code and i < last_code
+                 and line.strip() and not line.rstrip().endswith(":")][KEEP_FINDINGS:]
+    dropped = set()
+    excess += count_tokens(_TRIM_NOTE)
+    while removable and excess > 0:
+        i = removable.pop()
+        excess -= count_tokens(body[i])
+        dropped.add(i)
+    if not dropped:
+        return lines, excess - count_tokens(_TRIM_NOTE)
+    first = min(dropped)
+    body = [_TRIM_NOTE.format(len(dropped)) if i == first else line
+            for i, line in enumerate(body) if i == first or i not in dropped]
+    return lines[:start + 1] + body + lines[end:], excess
+
+
+def _trim_text(lines, excess):
+    """Cut the middle out of the longest run of instruction lines: outside code
+    blocks, the requirement and the sections _trim_section has already cut
+    """
+    protected = _code_lines(lines)
+    for header in ("REQUIREMENT:",) + TRIMMABLE_SECTIONS:
+        span = _section(lines, header)
+        if span is not None:
+            protected.update(range(*span))
+    runs, start = [], None
+    for i in range(len(lines) + 1):
+        if i < len(lines) and i not in protected:
+            start = i if start is None else start
+        elif start is not None:
+            runs.append((start, i))
+            start = None
+    if not runs:
+        return lines, excess
+    start, end = max(runs, key=lambda r: count_tokens("\n".join(lines[r[0]:r[1]])))
+    middle = (start + end) // 2
+    low, high = middle, middle
+    excess += count_tokens(_TRIM_NOTE)
+    while excess > 0 and (low > start or high < end):
+        if high < end:
+            excess -= count_tokens(lines[high])
+            high += 1
+        if excess > 0 and low > start:
+            low -= 1
+            excess -= count_tokens(lines[low])
+    return lines[:low] + [_TRIM_NOTE.format(high - low)] + lines[high:], excess
+
+
+def fit_prompt(text, budget=None, label="prompt"):
+    """Return text compacted to fit the token budget, warning if it had to be cut.
+
+    Compaction goes from harmless to lossy: collapse blank runs and trailing
+    whitespace, drop duplicate instruction lines, shorten earlier stages'
+    feedback and attempts (TRIMMABLE_SECTIONS), then cut the middle out of the
+    longest stretch of instructions. Code blocks are never cut: a program with
+    a hole in it would be reviewed as broken.
+    """
+    budget = budget or prompt_budget()
+    if count_tokens(text) <= budget:
+        return text
+
+    compact = re.sub(r"[ \t]+\n", "\n", text)
+    compact = re.sub(r"\n{3,}", "\n\n", compact)
+    compact = dedupe_lines(compact)
+    tokens = count_tokens(compact)
+    if tokens <= budget:
+        logger.info("%s compacted to %d tokens (budget %d)", label, tokens, budget)
+        return compact
+
+    lines, excess = compact.splitlines(), tokens - budget
+    for header in TRIMMABLE_SECTIONS:
+        if excess > 0:
+            lines, excess = _trim_section(lines, header, excess)
+    if excess > 0:
+        lines, excess = _trim_text(lines, excess)
+    fitted = "\n".join(lines)
+    if excess > 0:
+        logger.warning("%s is still %d tokens over the %d token budget; its code blocks and "
+                       "requirement are sent whole (raise CONTEXT_WINDOW if the model allows it)",
+                       label, excess, budget)
+    else:
+        logger.warning("%s was %d tokens, over the %d token budget; trimmed its feedback and "
+                       "instructions (raise CONTEXT_WINDOW if the model allows it)", label, tokens, budget)
+    return fitted
@@ -0,0 +1,362 @@
+"""
+Job Server - HTTP API in front of CodeCrewOrchestrator with a bounded queue and worker pool
+
+Endpoints (JSON in and out):
+    POST   /jobs                {"query", "mode"?, "max_iterations"?, "user"?, "deadline"?} -> 202 job | 429 queue full
+    GET    /jobs/<id>           status, progress events and a tail of the live output
+    GET    /jobs/<id>/result    200 result | 202 still running | 409 failed, cancelled or rejected
+    POST   /jobs/<id>/cancel    (or DELETE /jobs/<id>)
+    GET    /history             past runs (?limit, status, mode, search)
+    GET    /runs/<id>           one past run in full
+    GET    /health              worker, queue and LLM slot occupancy, per-node load with several Ollama servers
+
+Run: python -m src.server --port 8600 --workers 2 --queue 32
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from src.config import (
+    SERVER_HOST, SERVER_PORT, SERVER_WORKERS, SERVER_QUEUE_SIZE, SERVER_JOB_RETENTION, SERVER_MAX_ITERATIONS,
+    OLLAMA_WARMUP,
+)
+from src.events import TOKEN
+from src.llm.client import GenerationCancelled
+from src.llm.scheduler import DeadlineMissed
+
+
+MODES = ("fast", "standard", "verified", "combined", "speculative")
+OUTPUT_TAIL = 4000  # Characters of live output kept per job
+EVENT_TAIL = 200  # Progress events (everything but tokens) kept per job
+HISTORY_LIMIT = 500  # Most past runs one /history call returns
+
+
+class QueueFull(Exception):
+    """Raised by JobManager.submit when every queue slot is taken"""
+
+
+class Job:
+    """One submitted request and everything the API reports about it"""
+
+    def __init__(self, query, mode, max_iterations=None, user=None, deadline=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.query = query
+        self.mode = mode
+        self.max_iterations = max_iterations
+        self.user = user
+        self.deadline = deadline  # Seconds from the start of the run
+        self.status = "queued"  # queued -> running -> done | failed | cancelled | rejected
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.stage = None
+        self.output = ""
+        self.events = deque(maxlen=EVENT_TAIL)
+        self.result = None
+        self.error = None
+        self.orchestrator = None
+        self.cancel_requested = False
+
+    def on_event(self, event):
+        """Orchestrator event subscriber: tokens feed the live output, the rest is kept"""
+        if event.kind == TOKEN:
+            if event.stage != self.stage:
+                self.stage, self.output = event.stage, ""
+            self.output = (self.output + event.data["text"])[-OUTPUT_TAIL:]
+        else:
+            self.events.append({"kind": event.kind, "stage": event.stage, "iteration": event.iteration,
+                                "timestamp": event.timestamp, "data": event.data})
+
+    def describe(self):
+        return {
+            "id": self.id,
+            "query": self.query,
+            "mode": self.mode,
+            "user": self.user,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "stage": self.stage,
+            "output": self.output,
+            "events": list(self.events),
+            "error": self.error,
+            "run_id": (self.result or {}).get("run_id"),
+        }
+
+
+class JobManager:
+    """Bounded FIFO of jobs drained by a fixed pool of worker threads.
+
+    Each worker owns one orchestrator, so at most `workers` requests hit
+    Ollama at once; anything beyond `queue_size` waiting jobs is refused.
+    Workers take a job off the queue and mark it running under the same lock
+    cancel() holds, so a cancelled job never starts, and cancelling a queued
+    job frees its place in the queue.
+    """
+
+    def __init__(self, workers=None, queue_size=None, retention=None, orchestrator_factory=None):
+        self.workers = workers or SERVER_WORKERS
+        self.retention = retention or SERVER_JOB_RETENTION
+        self.queue_size = queue_size or SERVER_QUEUE_SIZE
+        self._queue = deque()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._running = 0
+        if orchestrator_factory is None:
+            from src.main import CodeCrewOrchestrator
+            orchestrator_factory = lambda: CodeCrewOrchestrator(verbose=False)
+        self._factory = orchestrator_factory
+        self._threads = [
+            threading.Thread(target=self._work, name=f"codecrew-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, query, mode="standard", max_iterations=None, user=None, deadline=None):
+        """Queue a job; raises QueueFull instead of waiting"""
+        job = Job(query, mode, max_iterations, user, deadline)
+        with self._lock:
+            if len(self._queue) >= self.queue_size:
+                raise QueueFull()
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._ready.notify()
+        self._prune()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a queued job outright, or signal a running one to stop"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.cancel_requested = True
+            if job.status == "queued":
+                self._queue.remove(job)
+                job.status, job.finished = "cancelled", time.time()
+            elif job.status == "running":
+                job.orchestrator.cancel()
+        return job
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.workers, "running": self._running,
+                    "queued": len(self._queue), "queue_size": self.queue_size}
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the retention limit"""
+        with self._lock:
+            finished = [j.id for j in self._jobs.values() if j.finished is not None]
+            for job_id in finished[:max(0, len(finished) - self.retention)]:
+                del self._jobs[job_id]
+
+    def _work(self):
+        orchestrator = self._factory()
+        default_iterations = orchestrator.max_iterations
+        default_deadline = orchestrator.deadline
+        while True:
+            with self._lock:
+                while not self._queue:
+                    self._ready.wait()
+                job = self._queue.popleft()
+                # From here cancel() signals the orchestrator, so its event is cleared first
+                orchestrator.cancel_event.clear()
+                job.orchestrator = orchestrator
+                job.status, job.started = "running", time.time()
+                self._running += 1
+            subscription = orchestrator.events.subscribe(job.on_event)
+            orchestrator.max_iterations = job.max_iterations or default_iterations
+            orchestrator.user = job.user
+            orchestrator.deadline = job.deadline or default_deadline
+            try:
+                job.result = orchestrator.process(job.query, job.mode)
+                job.status = "done"
+            except GenerationCancelled:
+                job.status = "cancelled"
+            except DeadlineMissed as e:
+                job.status, job.error = "rejected", str(e)
+            except Exception as e:
+                job.status, job.error = "failed", str(e)
+            finally:
+                subscription.close()
+                with self._lock:
+                    job.finished = time.time()
+                    job.orchestrator = None
+                    self._running -= 1
+
+
+class JobServer(ThreadingHTTPServer):
+    """Threaded HTTP server exposing a JobManager"""
+
+    daemon_threads = True
+
+    def __init__(self, host=None, port=None, manager=None):
+        super().__init__((host or SERVER_HOST, SERVER_PORT if port is None else port), _Handler)
+        self.manager = manager or JobManager()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve from a background thread; returns self for chaining"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        url = urlparse(self.path)
+        return [p for p in url.path.split("/") if p], parse_qs(url.query)
+
+    def do_GET(self):
+        parts, params = self._route()
+        manager = self.server.manager
+        if parts == ["health"]:
+            from src.llm.balancer import node_stats
+            from src.llm.scheduler import schedulers
+            self._send_json({**manager.stats(), "slots": [s.stats() for s in schedulers()],
+                             "nodes": node_stats()})
+        elif parts == ["history"]:
+            from src.tools.run_history import get_run_history
+            arg = lambda name: params.get(name, [None])[0]
+            try:
+                limit = int(arg("limit") or 20)
+            except ValueError:
+                self._send_json({"error": "limit must be an integer"}, 400)
+                return
+            self._send_json(get_run_history().history(
+                limit=max(1, min(limit, HISTORY_LIMIT)), status=arg("status"), mode=arg("mode"),
+                text=arg("search")))
+        elif len(parts) == 2 and parts[0] == "runs" and parts[1].isdigit():
+            from src.tools.run_history import get_run_history
+            run = get_run_history().get(int(parts[1]))
+            self._send_json(run if run else {"error": "no such run"}, 200 if run else 404)
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            job = manager.get(parts[1])
+            if job is None:
+                self._send_json({"error": "no such job"}, 404)
+            elif len(parts) == 2:
+                self._send_json(job.describe())
+            elif parts[2] == "result":
+                if job.status == "done":
+                    self._send_json(job.result)
+                elif job.status in ("queued", "running"):
+                    self._send_json(job.describe(), 202)
+                else:
+                    self._send_json(job.describe(), 409)
+            else:
+                self._send_json({"error": "not found"}, 404)
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        parts, _ = self._route()
+        manager = self.server.manager
+        if parts == ["jobs"]:
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json({"error": "invalid JSON"}, 400)
+                return
+            query = (request.get("query") or "").strip()
+            mode = request.get("mode") or "standard"
+            if not query or mode not in MODES:
+                self._send_json({"error": f"need a query and a mode in {MODES}"}, 400)
+                return
+            deadline = request.get("deadline")
+            if deadline is not None and (
+                    isinstance(deadline, bool) or not isinstance(deadline, (int, float)) or deadline <= 0):
+                self._send_json({"error": "deadline must be a positive number of seconds"}, 400)
+                return
+            user = request.get("user")
+            if user is not None and (not isinstance(user, str) or not user.strip()):
+                self._send_json({"error": "user must be a non-empty string"}, 400)
+                return
+            max_iterations = request.get("max_iterations")
+            if max_iterations is not None and (
+                    isinstance(max_iterations, bool) or not isinstance(max_iterations, int)
+                    or not 1 <= max_iterations <= SERVER_MAX_ITERATIONS):
+                self._send_json({"error": f"max_iterations must be an integer from 1 to {SERVER_MAX_ITERATIONS}"}, 400)
+                return
+            try:
+                job = manager.submit(query, mode, max_iterations, user, deadline)
+            except QueueFull:
+                self._send_json({"error": "queue full", **manager.stats()}, 429, {"Retry-After": "5"})
+                return
+            self._send_json(job.describe(), 202)
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+            self._cancel(parts[1])
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_DELETE(self):
+        parts, _ = self._route()
+        if len(parts) == 2 and parts[0] == "jobs":
+            self._cancel(parts[1])
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def _cancel(self, job_id):
+        job = self.server.manager.cancel(job_id)
+        if job is None:
+            self._send_json({"error": "no such job"}, 404)
+        else:
+            self._send_json(job.describe())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CodeCrew job server")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS,
+                        help="Concurrent requests; match OLLAMA_NUM_PARALLEL")
+    parser.add_argument("--queue", type=int, default=SERVER_QUEUE_SIZE, help="Waiting jobs before 429")
+    args = parser.parse_args()
+
+    if OLLAMA_WARMUP:
+        from src.llm.runtime import get_runtime
+        get_runtime().warm_up()  # Once for all workers, before the first job arrives
+    server = JobServer(args.host, args.port, JobManager(args.workers, args.queue))
+    print(f"CodeCrew job server on {server.url} ({args.workers} workers, queue {args.queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,32 @@
 """
 Code Generation Task - Developer agent task
 """
-from crewai import Task
+from src.agents.registry import get_agent
+from src.prompting import dedupe_lines
 
-from src.agents.developer import create_developer_agent
 
-
-def create_code_generation_task(user_query: str, context: str = ""):
+def create_code_generation_task(user_query: str, context: str = "", agent=None):
     """
     Create a code generation task for the Developer agent
     
     Args:
         user_query: The user's programming requirement
         context: Optional context or previous attempts
+        agent: Existing agent to use (defaults to the shared registry agent)
     
     Returns:
         Task: A CrewAI Task for code generation
     """
-    developer = create_developer_agent()
+    developer = agent or get_agent("developer")
     
-    context_section = f"CONTEXT FROM PREVIOUS ATTEMPTS:\n{context}" if context else ""
+    # Last, so first attempts and repairs share everything before it (server prompt cache)
+    context_section = f"CONTEXT FROM PREVIOUS ATTEMPTS:\n{dedupe_lines(context)}" if context else ""
     
     task_description = f"""Generate production-ready Python code.
 
 REQUIREMENT:
 {user_query}
 
-{context_section}
-
 BEFORE WRITING CODE, VERIFY:
 1. Enum values match how they're used (if .lower() is called, value must be string)
 2. User input parsing matches expected types (can't pass string to Enum expecting int)
@@ -46,9 +45,13 @@ CONSTRAINTS:
 - Test your code mentally: trace through with sample inputs
 - Verify all method calls are valid for their types
 
+{context_section}
+
 OUTPUT: Only the Python code, nothing else.
 """
     
+    from src.engine import Task
+
     task = Task(
         description=task_description,
         expected_output="Production-ready Python code with error handling, validation, docstrings, and usage example",
@@ -1,32 +1,25 @@
 """
 Debugging Task - QA Engineer agent task
 """
-from crewai import Task
+from src.agents.registry import get_agent
+from src.prompting import stage_prompt
 
-from src.agents.qa_debugger import create_qa_agent
 
-
-def create_debugging_task(code: str, user_query: str):
+def create_debugging_task(code: str, user_query: str, agent=None):
     """
     Create a debugging task for the QA Engineer agent
     
     Args:
         code: The code to debug and analyze
         user_query: The original user query for context
+        agent: Existing agent to use (defaults to the shared registry agent)
     
     Returns:
         Task: A CrewAI Task for debugging
     """
-    qa_agent = create_qa_agent()
+    qa_agent = agent or get_agent("qa")
     
-    task_description = f"""Debug this code by mentally executing it line by line.
-
-REQUIREMENT: {user_query}
-
-CODE:
-```python
-{code}
-```
+    task_description = stage_prompt(user_query, code, """Debug this code by mentally executing it line by line.
 
 CRITICAL CHECKS (trace through the code mentally):
 1. TYPE MISMATCHES: Is .lower()/.upper() called on non-strings? Is int used where string expected?
@@ -42,10 +35,13 @@ FIND AND FIX:
 - Missing error handling
 
 OUTPUT:
-1. List each bug found with line number
-2. Provide the COMPLETE FIXED code
-"""
+1. First line exactly: BUGS FOUND: <number> (BUGS FOUND: 0 if the code is correct)
+2. List each bug found with line number
+3. Provide the COMPLETE FIXED code
+""")
     
+    from src.engine import Task
+
     task = Task(
         description=task_description,
         expected_output="List of issues with severity, and fixed optimized code",
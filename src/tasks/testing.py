@@ -1,17 +1,12 @@
 """Testing Task - Run the tests"""
-from crewai import Task
-from src.agents.testing_agent import create_testing_agent
+from src.agents.registry import get_agent
+from src.prompting import stage_prompt
 
 
-def create_testing_task(code, test_scenarios):
-    agent = create_testing_agent()
+def create_testing_task(code, test_scenarios, agent=None, user_query=""):
+    agent = agent or get_agent("testing")
     
-    desc = f"""Run these tests against the code.
-
-Code:
-```python
-{code}
-```
+    desc = stage_prompt(user_query, code, f"""Run these tests against the code.
 
 Tests:
 {test_scenarios}
@@ -25,8 +20,10 @@ Output like this:
 End with:
 SUMMARY: X/Y passed
 STATUS: ALL_PASSED or SOME_FAILED
-"""
+""")
     
+    from src.engine import Task
+
     return Task(
         description=desc,
         expected_output="Test results with PASS/FAIL and final STATUS",
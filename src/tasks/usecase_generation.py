@@ -1,20 +1,12 @@
 """Use Case Task - Generate test scenarios"""
-from crewai import Task
-from src.agents.usecase_agent import create_usecase_agent
+from src.agents.registry import get_agent
+from src.prompting import stage_prompt
 
 
-def create_usecase_task(code, user_query):
-    agent = create_usecase_agent()
+def create_usecase_task(code, user_query, agent=None):
+    agent = agent or get_agent("usecase")
     
-    desc = f"""Analyze this code and generate comprehensive test scenarios.
-
-## Original Requirement:
-{user_query}
-
-## Code to Test:
-```python
-{code}
-```
+    desc = stage_prompt(user_query, code, """Analyze this code and generate comprehensive test scenarios.
 
 ## Instructions:
 1. Identify ALL functions in the code
@@ -39,14 +31,16 @@ def create_usecase_task(code, user_query):
 
 ## Output Format (JSON only):
 [
-  {{"test_name": "test_funcname_normal_typical", "function": "funcname", "inputs": {{"param1": value}}, "expected": result, "category": "normal"}},
-  {{"test_name": "test_funcname_edge_zero", "function": "funcname", "inputs": {{"param1": 0}}, "expected": result, "category": "edge"}},
-  {{"test_name": "test_funcname_error_none", "function": "funcname", "inputs": {{"param1": null}}, "expected": "raises TypeError", "category": "error"}}
+  {"test_name": "test_funcname_normal_typical", "function": "funcname", "inputs": {"param1": value}, "expected": result, "category": "normal"},
+  {"test_name": "test_funcname_edge_zero", "function": "funcname", "inputs": {"param1": 0}, "expected": result, "category": "edge"},
+  {"test_name": "test_funcname_error_none", "function": "funcname", "inputs": {"param1": null}, "expected": "raises TypeError", "category": "error"}
 ]
 
 Generate 5-8 test scenarios total. Cover each function. Just output the JSON array, no explanation.
-"""
+""")
     
+    from src.engine import Task
+
     return Task(
         description=desc,
         expected_output="JSON array of test scenarios with test_name, function, inputs, expected, and category fields",
@@ -1,12 +1,11 @@
 """
 Validation Task - Reviewer agent task
 """
-from crewai import Task
+from src.agents.registry import get_agent
+from src.prompting import stage_prompt, summarize_feedback
 
-from src.agents.reviewer import create_reviewer_agent
 
-
-def create_validation_task(code: str, user_query: str, previous_feedback: str = ""):
+def create_validation_task(code: str, user_query: str, previous_feedback: str = "", agent=None):
     """
     Create a validation task for the Reviewer agent
     
@@ -14,22 +13,17 @@ def create_validation_task(code: str, user_query: str, previous_feedback: str =
         code: The code to validate
         user_query: The original user query for context
         previous_feedback: Feedback from previous iterations
+        agent: Existing agent to use (defaults to the shared registry agent)
     
     Returns:
         Task: A CrewAI Task for validation
     """
-    reviewer = create_reviewer_agent()
+    reviewer = agent or get_agent("reviewer")
     
-    feedback_section = f"PREVIOUS FEEDBACK:\n{previous_feedback}" if previous_feedback else ""
+    # QA feedback repeats the whole program; only its findings matter here
+    feedback_section = f"PREVIOUS FEEDBACK:\n{summarize_feedback(previous_feedback)}" if previous_feedback else ""
     
-    task_description = f"""Final code review - TRACE THROUGH THE CODE MENTALLY.
-
-REQUIREMENT: {user_query}
-
-CODE:
-```python
-{code}
-```
+    task_description = stage_prompt(user_query, code, f"""Final code review - TRACE THROUGH THE CODE MENTALLY.
 
 {feedback_section}
 
@@ -53,8 +47,10 @@ DECISION (pick one):
 OUTPUT FORMAT:
 Decision: [APPROVED/NEEDS_REVISION]
 Issues: [list any problems]
-"""
+""")
     
+    from src.engine import Task
+
     task = Task(
         description=task_description,
         expected_output="Decision (APPROVED/NEEDS_REVISION) with brief justification",
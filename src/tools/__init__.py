@@ -0,0 +1,32 @@
+"""Helper utilities for CodeCrew"""
+
+from .code_executor import (
+    execute_tests, parse_scenarios, run_scenarios, format_report,
+    format_failures, function_signatures, run_program,
+)
+from .code_fence import CodeFenceExtractor, extract_code
+from .llm_cache import LLMCache, cache_key, get_llm_cache
+from .query_index import QueryIndex, get_query_index
+from .run_history import RunHistory, get_run_history
+from .static_checks import check_code, format_errors
+
+__all__ = [
+    "execute_tests",
+    "parse_scenarios",
+    "run_scenarios",
+    "format_report",
+    "format_failures",
+    "function_signatures",
+    "run_program",
+    "CodeFenceExtractor",
+    "extract_code",
+    "LLMCache",
+    "cache_key",
+    "get_llm_cache",
+    "QueryIndex",
+    "get_query_index",
+    "RunHistory",
+    "get_run_history",
+    "check_code",
+    "format_errors"
+]
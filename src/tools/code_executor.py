@@ -0,0 +1,290 @@
+"""
+Code Executor - Runs generated code against test scenarios in a sandbox
+"""
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import TEST_TIMEOUT, TEST_MEMORY_MB, TEST_WORKERS
+
+
+# Executed by a fresh interpreter for every scenario. It applies the resource
+# limits to itself before touching the generated code, imports the code as a
+# module (so the __main__ block never runs) and prints one JSON line.
+_RUNNER = r'''
+import contextlib, io, json, sys
+try:
+    import resource
+except ImportError:
+    resource = None
+
+payload = json.loads(sys.stdin.read())
+if resource is not None:
+    cpu = payload["cpu_seconds"]
+    mem = payload["memory_mb"] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+    resource.setrlimit(resource.RLIMIT_AS, (mem, mem))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (1024 * 1024, 1024 * 1024))
+
+out = sys.stdout
+report = {"passed": False, "got": None, "error": None}
+try:
+    namespace = {"__name__": "generated"}
+    with contextlib.redirect_stdout(io.StringIO()):
+        exec(compile(payload["code"], "<generated>", "exec"), namespace)
+        func = namespace.get(payload["function"])
+        if func is None:
+            raise NameError("function %r not found" % payload["function"])
+        inputs = payload["inputs"]
+        if isinstance(inputs, dict):
+            value = func(**inputs)
+        elif isinstance(inputs, list):
+            value = func(*inputs)
+        elif inputs is None:
+            value = func()
+        else:
+            value = func(inputs)
+    report["got"] = repr(value)
+    report["passed"] = payload["expects_error"] is None and _matches(value, payload["expected"])
+except BaseException as exc:
+    report["got"] = "%s: %s" % (type(exc).__name__, exc)
+    report["error"] = type(exc).__name__
+    wanted = payload["expects_error"]
+    report["passed"] = wanted is not None and (
+        wanted == "" or any(wanted == cls.__name__ for cls in type(exc).__mro__)
+    )
+out.write(json.dumps(report) + "\n")
+'''
+
+_MATCHER = r'''
+import ast as _ast
+
+def _matches(value, expected):
+    if value == expected:
+        return True
+    if isinstance(value, tuple) and list(value) == expected:
+        return True
+    if isinstance(value, float) and isinstance(expected, (int, float)):
+        return abs(value - expected) <= 1e-9 * max(1.0, abs(expected))
+    if isinstance(expected, str):
+        if str(value) == expected or repr(value) == expected:
+            return True
+        try:
+            return value == _ast.literal_eval(expected)
+        except (ValueError, SyntaxError, TypeError, MemoryError):
+            return False
+    return False
+'''
+
+# Runs the generated program as __main__ (its usage example) with no stdin
+_SMOKE_RUNNER = r'''
+import contextlib, io, json, sys
+try:
+    import resource
+except ImportError:
+    resource = None
+
+payload = json.loads(sys.stdin.read())
+if resource is not None:
+    cpu = payload["cpu_seconds"]
+    mem = payload["memory_mb"] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+    resource.setrlimit(resource.RLIMIT_AS, (mem, mem))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (1024 * 1024, 1024 * 1024))
+
+out = sys.stdout
+sys.stdin = io.StringIO("")
+report = {"passed": False, "got": None, "error": None}
+try:
+    with contextlib.redirect_stdout(io.StringIO()):
+        exec(compile(payload["code"], "<generated>", "exec"), {"__name__": "__main__"})
+    report["passed"] = True
+except SystemExit as exc:
+    report["passed"] = exc.code in (None, 0)
+    report["got"] = "exit code %s" % exc.code
+except BaseException as exc:
+    report["got"] = "%s: %s" % (type(exc).__name__, exc)
+    report["error"] = type(exc).__name__
+out.write(json.dumps(report) + "\n")
+'''
+
+_RAISES = re.compile(r"^\s*(?:raises?|throws?)\s*([A-Za-z_][A-Za-z0-9_]*)?", re.IGNORECASE)
+
+
+def parse_scenarios(text):
+    """Pull the JSON list of test scenarios out of the use case agent's output"""
+    candidates = re.findall(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    start, end = text.find("["), text.rfind("]")
+    if start != -1 and end > start:
+        candidates.append(text[start:end + 1])
+
+    for candidate in candidates:
+        try:
+            data = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            data = [data]
+        if not isinstance(data, list):
+            continue
+        scenarios = [
+            s for s in data
+            if isinstance(s, dict) and s.get("function") and "inputs" in s
+        ]
+        if scenarios:
+            for i, s in enumerate(scenarios):
+                s.setdefault("test_name", f"test_{i + 1}")
+            return scenarios
+    return []
+
+
+def _expected_error(expected):
+    """Return the exception name a scenario expects ("" for any), or None"""
+    if not isinstance(expected, str):
+        return None
+    match = _RAISES.match(expected)
+    if match:
+        return match.group(1) or ""
+    return None
+
+
+def run_scenario(code, scenario, timeout=None, memory_mb=None):
+    """Run a single scenario in an isolated interpreter and return its outcome"""
+    timeout = timeout or TEST_TIMEOUT
+    payload = {
+        "code": code,
+        "function": scenario["function"],
+        "inputs": scenario.get("inputs"),
+        "expected": scenario.get("expected"),
+        "expects_error": _expected_error(scenario.get("expected")),
+        "cpu_seconds": max(1, int(timeout)),
+        "memory_mb": memory_mb or TEST_MEMORY_MB,
+    }
+    outcome = {
+        "test_name": scenario["test_name"],
+        "function": scenario["function"],
+        "inputs": scenario.get("inputs"),
+        "expected": scenario.get("expected"),
+        "category": scenario.get("category", ""),
+    }
+    outcome.update(_sandboxed(_MATCHER + _RUNNER, payload, timeout))
+    return outcome
+
+
+def _sandboxed(script, payload, timeout):
+    """Run a runner script in a fresh isolated interpreter and decode its report"""
+    with tempfile.TemporaryDirectory(prefix="codecrew_") as workdir:
+        try:
+            proc = subprocess.run(
+                [sys.executable, "-I", "-c", script],
+                input=json.dumps(payload),
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                cwd=workdir,
+                env={"PATH": os.environ.get("PATH", "")},
+            )
+        except subprocess.TimeoutExpired:
+            return {"passed": False, "got": f"timed out after {timeout}s", "error": "Timeout"}
+
+    lines = proc.stdout.strip().splitlines()
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        reason = proc.stderr.strip().splitlines()[-1:] or [f"exit code {proc.returncode}"]
+        return {"passed": False, "got": f"crashed: {reason[0]}", "error": "Crash"}
+
+
+def run_program(code, timeout=None, memory_mb=None):
+    """Run the code as a script (its usage example) in the sandbox.
+
+    Returns {"passed", "got", "error"}; a program that stops at input() fails
+    with error "EOFError" because stdin is empty.
+    """
+    timeout = timeout or TEST_TIMEOUT
+    payload = {
+        "code": code,
+        "cpu_seconds": max(1, int(timeout)),
+        "memory_mb": memory_mb or TEST_MEMORY_MB,
+    }
+    return _sandboxed(_SMOKE_RUNNER, payload, timeout)
+
+
+def run_scenarios(code, scenarios, timeout=None, memory_mb=None, max_workers=None):
+    """Run all scenarios concurrently, one sandboxed process each"""
+    if not scenarios:
+        return []
+    workers = max(1, min(max_workers or TEST_WORKERS, len(scenarios)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(
+            lambda s: run_scenario(code, s, timeout, memory_mb), scenarios
+        ))
+
+
+def format_report(results):
+    """Render results in the same [PASS]/[FAIL] format the testing agent used"""
+    lines = []
+    for r in results:
+        tag = "PASS" if r["passed"] else "FAIL"
+        lines.append(f"[{tag}] {r['test_name']}: expected {r['expected']}, got {r['got']}")
+    passed = sum(1 for r in results if r["passed"])
+    status = "ALL_PASSED" if results and passed == len(results) else "SOME_FAILED"
+    lines.append(f"SUMMARY: {passed}/{len(results)} passed")
+    lines.append(f"STATUS: {status}")
+    return "\n".join(lines)
+
+
+def format_failures(results):
+    """Only the failing cases, with the call that failed, for the developer's repair prompt"""
+    lines = []
+    for r in results:
+        if r["passed"]:
+            continue
+        inputs = r.get("inputs")
+        if isinstance(inputs, dict):
+            args = ", ".join(f"{k}={v!r}" for k, v in inputs.items())
+        elif isinstance(inputs, list):
+            args = ", ".join(repr(v) for v in inputs)
+        else:
+            args = "" if inputs is None else repr(inputs)
+        lines.append(f"[FAIL] {r['function']}({args}): expected {r['expected']}, got {r['got']}")
+    return "\n".join(lines)
+
+
+def function_signatures(code):
+    """Map each top-level function and class to its call signature.
+
+    Scenarios only depend on these; as long as they are unchanged a repaired
+    version of the code can be tested against the same scenarios.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return {}
+    signatures = {}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            signatures[node.name] = ast.unparse(node.args)
+        elif isinstance(node, ast.ClassDef):
+            init = next((n for n in node.body
+                         if isinstance(n, ast.FunctionDef) and n.name == "__init__"), None)
+            signatures[node.name] = ast.unparse(init.args) if init else ""
+    return signatures
+
+
+def execute_tests(code, scenarios_text):
+    """Parse scenarios, run them and return (report, results).
+
+    Returns (None, []) when no usable scenarios could be parsed, so the
+    caller can fall back to the LLM testing agent.
+    """
+    scenarios = parse_scenarios(scenarios_text)
+    if not scenarios:
+        return None, []
+    results = run_scenarios(code, scenarios)
+    return format_report(results), results
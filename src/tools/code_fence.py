@@ -0,0 +1,97 @@
+"""
+Code Fence - Incremental extraction of fenced code blocks from a token stream
+
+Early stop is decided here, client-side, rather than by an Ollama stop
+sequence: a closing fence looks the same after a bash or text block as
+after the code, and only the parser knows which block it closes.
+"""
+import ast
+
+FENCE = "```"
+PYTHON_LANGUAGES = ("python", "py", "python3")
+
+
+def is_python(code):
+    """Whether code parses as Python"""
+    try:
+        ast.parse(code)
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+
+class CodeFenceExtractor:
+    """Parses markdown code fences as text arrives.
+
+    feed() returns True once a python block, or an unlabelled one that parses
+    as Python, has been closed: the code is complete and the rest of the
+    response can be skipped. Blocks in other languages (a ```bash install
+    line, sample output) never end it. Later blocks are still parsed if
+    feeding continues; code() picks the best one.
+    """
+
+    def __init__(self):
+        self.blocks = []  # (language, code) of closed blocks, in order
+        self.done = False
+        self._parts = []
+        self._line = ""  # Text after the last newline
+        self._language = None  # Language of the open block; None outside a block
+        self._body = []
+
+    def feed(self, text):
+        self._parts.append(text)
+        lines = (self._line + text).split("\n")
+        self._line = lines.pop()
+        for line in lines:
+            self._take(line)
+        if self._language is not None and FENCE in self._line:
+            # A closing fence needs no newline after it; don't wait for one
+            self._take(self._line)
+            self._line = ""
+        return self.done
+
+    def _take(self, line):
+        if self._language is None:
+            stripped = line.strip()
+            if stripped.startswith(FENCE):
+                self._language = stripped[len(FENCE):].strip().lower()
+                self._body = []
+            return
+        if FENCE not in line:
+            self._body.append(line)
+            return
+        self._body.append(line[:line.index(FENCE)])
+        code = "\n".join(self._body).strip()
+        self.blocks.append((self._language, code))
+        if self._language in PYTHON_LANGUAGES or (not self._language and is_python(code)):
+            self.done = True
+        self._language = None
+
+    def code(self):
+        """The first python block, else an unterminated python or unlabelled
+        block, else the first block that parses as Python, else the first
+        block of any kind, else the whole text
+        """
+        for language, code in self.blocks:
+            if language in PYTHON_LANGUAGES:
+                return code
+        unterminated = None
+        if self._language is not None:
+            unterminated = "\n".join(self._body + [self._line]).strip()
+            if self._language in PYTHON_LANGUAGES or not self._language:
+                return unterminated
+        for language, code in self.blocks:
+            if is_python(code):
+                return code
+        if self.blocks:
+            return self.blocks[0][1]
+        if unterminated is not None:
+            return unterminated
+        return "".join(self._parts)
+
+
+def extract_code(text):
+    """Pull code out of a complete response"""
+    extractor = CodeFenceExtractor()
+    extractor.feed(text)
+    return extractor.code()
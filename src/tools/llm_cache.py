@@ -0,0 +1,129 @@
+"""
+LLM Cache - Persistent, content-addressed cache of LLM responses
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from src.config import LLM_CACHE_DIR, LLM_CACHE_MAX_MB, LLM_CACHE_MAX_AGE_DAYS
+
+
+# Sampling settings that change what the model returns for the same prompt
+SAMPLING_PARAMS = ("temperature", "top_p", "top_k", "num_ctx", "num_predict",
+                   "repeat_penalty", "mirostat", "seed", "stop")
+
+
+def cache_key(agent, task, options=None):
+    """Hash everything that determines the response for an (agent, task) pair.
+
+    options are per-call sampling overrides (see src.llm.streaming).
+    """
+    llm = getattr(agent, "llm", None)
+    material = {
+        "model": getattr(llm, "model", None),
+        "params": {p: getattr(llm, p, None) for p in SAMPLING_PARAMS},
+        "agent": [getattr(agent, f, None) for f in ("role", "goal", "backstory")],
+        "task": [getattr(task, f, None) for f in ("description", "expected_output")],
+    }
+    if options:
+        material["overrides"] = options
+    blob = json.dumps(material, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed response cache with size- and age-based LRU eviction"""
+
+    def __init__(self, path=None, max_bytes=None, max_age=None):
+        path = path or os.path.join(LLM_CACHE_DIR, "llm_cache.sqlite")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else LLM_CACHE_MAX_MB * 1024 * 1024
+        self.max_age = max_age if max_age is not None else LLM_CACHE_MAX_AGE_DAYS * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created REAL NOT NULL,
+            accessed REAL NOT NULL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed)")
+        self._db.commit()
+        self.evict()
+
+    def get(self, key):
+        """Cached response for key, or None"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.max_age and now - row[1] > self.max_age):
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        """Store a response and evict old entries if the cache is over budget"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._db.commit()
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        with self._lock:
+            if self.max_age:
+                self._db.execute("DELETE FROM responses WHERE created < ?",
+                                 (time.time() - self.max_age,))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                freed = 0
+                stale = []
+                for key, size in self._db.execute(
+                        "SELECT key, size FROM responses ORDER BY accessed"):
+                    stale.append((key,))
+                    freed += size
+                    if freed >= excess:
+                        break
+                self._db.executemany("DELETE FROM responses WHERE key = ?", stale)
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Process-wide cache instance, opened on first use"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+        return _default_cache
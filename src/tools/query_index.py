@@ -0,0 +1,257 @@
+"""
+Query Index - Near-duplicate lookup of past queries (MinHash + LSH over character n-grams and word pairs)
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter
+
+from src.config import LLM_CACHE_DIR
+
+
+NUM_HASHES = 64
+BANDS = 16  # 16 bands x 4 rows: queries with Jaccard >= ~0.6 almost always collide
+ROWS = NUM_HASHES // BANDS
+SHINGLE = 3
+RERANK = 8  # Candidates (most shared bands first) whose full signatures are compared
+KEY_WORD = 5  # Words this long or longer also index their entry, typos included
+COMMON_WORD = 256  # Entries a word key may have before it is too common to say anything
+HASH_ROWS = 65536  # Shingles whose 64 permuted hashes are kept; most shingles recur across queries
+
+_MASK64 = (1 << 64) - 1
+# Multiply-shift hash family with fixed (odd a, b) pairs, so signatures stay
+# comparable across processes
+_PERMUTATIONS = [
+    ((zlib.crc32(f"a{i}".encode()) << 32 | zlib.crc32(f"c{i}".encode())) | 1,
+     zlib.crc32(f"b{i}".encode()) << 32)
+    for i in range(NUM_HASHES)
+]
+
+# Words that carry no meaning in a code request ("write a python function that ...").
+# Direction and order words ("to", "for", "from", "using") stay: they tell
+# "convert a list to a dict" from "convert a dict to a list".
+_FILLER = {
+    "a", "an", "the", "in", "use", "with", "that", "which", "of",
+    "and", "please", "write", "create", "generate", "make", "implement", "build", "code",
+    "python", "program", "script", "function", "me", "can", "you", "i", "need", "want",
+}
+
+
+def normalize(query):
+    """Lowercase, strip punctuation, filler words and plural/verb "s" endings"""
+    words = re.findall(r"[a-z0-9]+", query.lower())
+    kept = [w for w in words if w not in _FILLER] or words
+    return " ".join(w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+                    for w in kept)
+
+
+def shingles(text):
+    """Character n-grams of each word (typo tolerant) plus ordered word pairs
+    (direction and order), hashed to 32 bits
+    """
+    words = text.split() or [""]
+    grams = set()
+    for word in words:
+        padded = f" {word} "
+        grams.update(padded[i:i + SHINGLE] for i in range(max(1, len(padded) - SHINGLE + 1)))
+    grams.update(f"{a}>{b}" for a, b in zip(words, words[1:]))
+    return {zlib.crc32(gram.encode()) for gram in grams}
+
+
+_hash_rows = {}  # shingle hash -> its value under every permutation
+
+
+def _hash_row(h):
+    row = _hash_rows.get(h)
+    if row is None:
+        if len(_hash_rows) >= HASH_ROWS:
+            _hash_rows.clear()
+        row = _hash_rows[h] = array("I", [((a * h + b) & _MASK64) >> 32 for a, b in _PERMUTATIONS])
+    return row
+
+
+def minhash(hashes):
+    """MinHash signature of a set of shingle hashes"""
+    return array("I", map(min, zip(*[_hash_row(h) for h in hashes])))
+
+
+def signature(query):
+    """MinHash signature of a query"""
+    return minhash(shingles(normalize(query)))
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_HASHES
+
+
+def word_keys(text):
+    """The long words of a normalized query with each one letter dropped, so
+    "fibonacci" and "fibonnaci" share the key "fibonaci"
+    """
+    return {word[:i] + word[i + 1:] for word in text.split() if len(word) >= KEY_WORD
+            for i in range(len(word))}
+
+
+def containment(jaccard, size_a, size_b):
+    """Share of the smaller shingle set found in the larger, from their Jaccard
+    similarity: a short query restated with more detail scores high here
+    """
+    if not size_a or not size_b:
+        return jaccard
+    shared = jaccard * (size_a + size_b) / (1 + jaccard)
+    return min(1.0, shared / min(size_a, size_b))
+
+
+def _bands(sig):
+    return [(band, tuple(sig[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+class QueryIndex:
+    """SQLite-backed store of past results with an in-memory LSH index over their queries.
+
+    Candidates come from shared LSH bands (near-duplicates) and from shared
+    long words (a short query restated with more words); each is scored by
+    Jaccard similarity and by containment of the smaller query in the larger.
+    """
+
+    def __init__(self, path=None):
+        path = path or os.path.join(LLM_CACHE_DIR, "query_index.sqlite")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS entries (
+            id INTEGER PRIMARY KEY,
+            query TEXT NOT NULL,
+            signature BLOB NOT NULL,
+            result TEXT NOT NULL,
+            created REAL NOT NULL)""")
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(entries)")}
+        if "normalized" not in columns:
+            self._migrate()
+        self._db.commit()
+        self._signatures = {}  # entry id -> signature
+        self._sizes = {}  # entry id -> number of shingles
+        self._buckets = {}  # (band, rows) or word key -> [entry ids]
+        self._exact = {}  # normalized query -> entry id
+        rows = self._db.execute("SELECT id, signature, normalized FROM entries ORDER BY id")
+        for entry_id, blob, normalized in rows:
+            sig = array("I")
+            sig.frombytes(blob)
+            self._insert(entry_id, sig, normalized)
+
+    def _migrate(self):
+        """Entries from before direction words and word pairs: re-sign them and keep
+        only the newest result per normalized query
+        """
+        self._db.execute("ALTER TABLE entries ADD COLUMN normalized TEXT")
+        newest = {}
+        for entry_id, query in self._db.execute("SELECT id, query FROM entries ORDER BY id").fetchall():
+            normalized = normalize(query)
+            if normalized in newest:
+                self._db.execute("DELETE FROM entries WHERE id = ?", (newest[normalized],))
+            newest[normalized] = entry_id
+            self._db.execute("UPDATE entries SET signature = ?, normalized = ? WHERE id = ?",
+                             (signature(query).tobytes(), normalized, entry_id))
+
+    def _insert(self, entry_id, sig, normalized=None):
+        self._signatures[entry_id] = sig
+        for key in _bands(sig):
+            self._buckets.setdefault(key, []).append(entry_id)
+        if normalized is not None:
+            self._sizes[entry_id] = len(shingles(normalized))
+            self._exact[normalized] = entry_id
+            for key in word_keys(normalized):
+                self._buckets.setdefault(key, []).append(entry_id)
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def add(self, query, result):
+        """Store a result under its query; a query already stored (once normalized)
+        gets the new result instead of a second entry
+        """
+        normalized = normalize(query)
+        sig = signature(query)
+        stored = json.dumps({k: v for k, v in result.items() if k != "metadata"}, default=str)
+        with self._lock:
+            entry_id = self._exact.get(normalized)
+            if entry_id is not None:
+                self._db.execute("UPDATE entries SET query = ?, result = ?, created = ? WHERE id = ?",
+                                 (query, stored, time.time(), entry_id))
+                self._db.commit()
+                return
+            cursor = self._db.execute(
+                "INSERT INTO entries (query, signature, result, created, normalized) VALUES (?, ?, ?, ?, ?)",
+                (query, sig.tobytes(), stored, time.time(), normalized),
+            )
+            self._db.commit()
+            self._insert(cursor.lastrowid, sig, normalized)
+
+    def nearest(self, query, threshold=0.0):
+        """(score, similarity, entry id) of the closest stored query whose score
+        (the higher of similarity and containment) is at or above threshold, or None
+        """
+        normalized = normalize(query)
+        grams = shingles(normalized)
+        sig, size = minhash(grams), len(grams)
+        best = None
+        with self._lock:
+            # Shared bands track similarity, so only the top few need a full comparison
+            shared = Counter()
+            for key in _bands(sig):
+                shared.update(self._buckets.get(key, ()))
+            for key in word_keys(normalized):
+                entries = self._buckets.get(key, ())
+                if len(entries) <= COMMON_WORD:
+                    shared.update(set(entries))
+            for entry_id, _ in shared.most_common(RERANK):
+                jaccard = similarity(sig, self._signatures[entry_id])
+                score = containment(jaccard, size, self._sizes.get(entry_id))  # Never below jaccard
+                if score >= threshold and (best is None or (score, jaccard) > best[:2]):
+                    best = (score, jaccard, entry_id)
+        return best
+
+    def lookup(self, query, threshold=0.0):
+        """Closest stored entry as {"query", "similarity", "containment", "exact", "result"}, or None.
+
+        "exact" means both queries normalize to the same text; only then is
+        the stored result known to answer this query as well.
+        """
+        match = self.nearest(query, threshold)
+        if match is None:
+            return None
+        score, jaccard, entry_id = match
+        with self._lock:
+            stored_query, result, normalized = self._db.execute(
+                "SELECT query, result, normalized FROM entries WHERE id = ?", (entry_id,)
+            ).fetchone()
+        return {"query": stored_query, "similarity": round(jaccard, 3), "containment": round(score, 3),
+                "exact": normalized == normalize(query), "result": json.loads(result)}
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+            self._signatures.clear()
+            self._sizes.clear()
+            self._buckets.clear()
+            self._exact.clear()
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def get_query_index():
+    """Process-wide index, loaded on first use"""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = QueryIndex()
+        return _default_index
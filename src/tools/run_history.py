@@ -0,0 +1,187 @@
+"""
+Run History - Persistent, indexed store of every pipeline run
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from src.config import RUN_HISTORY_DB
+
+
+# Result fields kept in their own columns or tables rather than in `details`
+_COLUMNS = ("query", "mode", "status", "code", "metadata")
+
+
+def query_hash(query):
+    """Hash of a query with case and whitespace normalized"""
+    return hashlib.sha256(" ".join(query.lower().split()).encode("utf-8")).hexdigest()
+
+
+def _since(value):
+    """Accept a timestamp, datetime or ISO date string"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+class RunHistory:
+    """SQLite store of runs; code is stored once per distinct content hash"""
+
+    def __init__(self, path=None):
+        path = path or RUN_HISTORY_DB
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                content TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                created REAL NOT NULL,
+                query TEXT NOT NULL,
+                query_hash TEXT NOT NULL,
+                mode TEXT,
+                status TEXT,
+                duration REAL,
+                code_hash TEXT REFERENCES blobs(hash),
+                details TEXT NOT NULL,
+                metadata TEXT);
+            CREATE TABLE IF NOT EXISTS code_versions (
+                run_id INTEGER NOT NULL REFERENCES runs(id),
+                seq INTEGER NOT NULL,
+                iteration INTEGER,
+                stage TEXT,
+                code_hash TEXT NOT NULL REFERENCES blobs(hash),
+                PRIMARY KEY (run_id, seq));
+            CREATE INDEX IF NOT EXISTS idx_runs_query ON runs(query_hash, created);
+            CREATE INDEX IF NOT EXISTS idx_runs_status ON runs(status, created);
+            CREATE INDEX IF NOT EXISTS idx_runs_created ON runs(created);
+        """)
+        self._db.commit()
+
+    def _blob(self, content):
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        self._db.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?)", (digest, content))
+        return digest
+
+    def record(self, result, code_versions=()):
+        """Store a result (and the code generated along the way); returns the run id.
+
+        code_versions is a list of {"iteration", "stage", "code"}.
+        """
+        metadata = result.get("metadata") or {}
+        details = {k: v for k, v in result.items() if k not in _COLUMNS}
+        with self._lock:
+            code = result.get("code")
+            cursor = self._db.execute(
+                "INSERT INTO runs (created, query, query_hash, mode, status, duration, code_hash,"
+                " details, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), result["query"], query_hash(result["query"]),
+                 metadata.get("mode") or result.get("mode"), result.get("status"),
+                 metadata.get("duration"), self._blob(code) if code else None,
+                 json.dumps(details, default=str), json.dumps(metadata, default=str)),
+            )
+            run_id = cursor.lastrowid
+            self._db.executemany(
+                "INSERT INTO code_versions VALUES (?, ?, ?, ?, ?)",
+                [(run_id, seq, v.get("iteration"), v.get("stage"), self._blob(v["code"]))
+                 for seq, v in enumerate(code_versions)],
+            )
+            self._db.commit()
+        return run_id
+
+    def history(self, limit=20, offset=0, status=None, mode=None, since=None, until=None,
+                query=None, text=None):
+        """Newest-first run summaries, filtered by status, mode, date range, exact
+        query (by hash, indexed) or a substring of the query text
+        """
+        clauses, params = [], []
+        if query is not None:
+            clauses.append("query_hash = ?")
+            params.append(query_hash(query))
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if mode is not None:
+            clauses.append("mode = ?")
+            params.append(mode)
+        if since is not None:
+            clauses.append("created >= ?")
+            params.append(_since(since))
+        if until is not None:
+            clauses.append("created < ?")
+            params.append(_since(until))
+        if text:
+            clauses.append("query LIKE ?")
+            params.append(f"%{text}%")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, created, query, mode, status, duration FROM runs {where}"
+                " ORDER BY created DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return [{
+            "id": run_id,
+            "created": datetime.fromtimestamp(created).isoformat(timespec="seconds"),
+            "query": q,
+            "mode": m,
+            "status": s,
+            "duration": d,
+        } for run_id, created, q, m, s, d in rows]
+
+    def get(self, run_id):
+        """The full stored result of a run, with its code versions, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT r.query, r.mode, r.status, b.content, r.details, r.metadata"
+                " FROM runs r LEFT JOIN blobs b ON b.hash = r.code_hash WHERE r.id = ?",
+                (run_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            versions = self._db.execute(
+                "SELECT v.iteration, v.stage, b.content FROM code_versions v"
+                " JOIN blobs b ON b.hash = v.code_hash WHERE v.run_id = ? ORDER BY v.seq",
+                (run_id,),
+            ).fetchall()
+        query, mode, status, code, details, metadata = row
+        return {
+            "id": run_id,
+            "query": query,
+            "mode": mode,
+            "status": status,
+            "code": code,
+            **json.loads(details),
+            "code_versions": [{"iteration": i, "stage": s, "code": c} for i, s, c in versions],
+            "metadata": json.loads(metadata) if metadata else {},
+        }
+
+    def stats(self):
+        """Run counts per status and the number of distinct code blobs"""
+        with self._lock:
+            by_status = dict(self._db.execute(
+                "SELECT COALESCE(status, 'unknown'), COUNT(*) FROM runs GROUP BY status"
+            ).fetchall())
+            blobs = self._db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+        return {"runs": sum(by_status.values()), "by_status": by_status, "code_blobs": blobs}
+
+
+_default_history = None
+_default_lock = threading.Lock()
+
+
+def get_run_history():
+    """Process-wide store, opened on first use"""
+    global _default_history
+    with _default_lock:
+        if _default_history is None:
+            _default_history = RunHistory()
+        return _default_history
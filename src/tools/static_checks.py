@@ -0,0 +1,187 @@
+"""
+Static Checks - Cheap local analysis of generated code before any LLM review
+"""
+import ast
+import builtins
+import sys
+import time
+
+from src.config import STATIC_ALLOWED_MODULES
+
+
+MODULE_DUNDERS = {"__name__", "__file__", "__doc__", "__spec__", "__loader__",
+                  "__package__", "__builtins__", "__annotations__", "__dict__", "__class__"}
+CLASS_DUNDERS = {"__module__", "__qualname__"}  # Set implicitly in every class body
+
+
+class _Names(ast.NodeVisitor):
+    """Collects every name bound anywhere in the module and every name read.
+
+    Binding is tracked module-wide rather than per scope, so the undefined-name
+    check only reports names that are bound nowhere at all - no false
+    positives from closures, globals or class bodies.
+    """
+
+    def __init__(self):
+        self.bound = set()
+        self.loaded = []  # (name, lineno)
+        self.imports = {}  # bound name -> (module, lineno)
+        self.star_import = False
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.loaded.append((node.id, node.lineno))
+        else:
+            self.bound.add(node.id)
+
+    def _bind_function(self, node):
+        self.bound.add(node.name)
+        args = node.args
+        for arg in args.posonlyargs + args.args + args.kwonlyargs:
+            self.bound.add(arg.arg)
+        for arg in (args.vararg, args.kwarg):
+            if arg is not None:
+                self.bound.add(arg.arg)
+        self.generic_visit(node)
+
+    visit_FunctionDef = _bind_function
+    visit_AsyncFunctionDef = _bind_function
+
+    def visit_Lambda(self, node):
+        args = node.args
+        for arg in args.posonlyargs + args.args + args.kwonlyargs:
+            self.bound.add(arg.arg)
+        for arg in (args.vararg, args.kwarg):
+            if arg is not None:
+                self.bound.add(arg.arg)
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node):
+        self.bound.add(node.name)
+        self.bound.update(CLASS_DUNDERS)
+        self.generic_visit(node)
+
+    def visit_TypeVar(self, node):  # def f[T](...) and class C[T] (Python 3.12+)
+        self.bound.add(node.name)
+        self.generic_visit(node)
+
+    visit_ParamSpec = visit_TypeVar
+    visit_TypeVarTuple = visit_TypeVar
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            name = alias.asname or alias.name.split(".")[0]
+            self.bound.add(name)
+            self.imports[name] = (alias.name, node.lineno)
+
+    def visit_ImportFrom(self, node):
+        module = "." * node.level + (node.module or "")
+        for alias in node.names:
+            if alias.name == "*":
+                self.star_import = True
+                continue
+            name = alias.asname or alias.name
+            self.bound.add(name)
+            self.imports[name] = (module, node.lineno)
+
+    def visit_ExceptHandler(self, node):
+        if node.name:
+            self.bound.add(node.name)
+        self.generic_visit(node)
+
+    def visit_Global(self, node):
+        self.bound.update(node.names)
+
+    visit_Nonlocal = visit_Global
+
+    def visit_MatchAs(self, node):
+        if node.name:
+            self.bound.add(node.name)
+        self.generic_visit(node)
+
+    def visit_MatchStar(self, node):
+        if node.name:
+            self.bound.add(node.name)
+
+    def visit_MatchMapping(self, node):
+        if node.rest:
+            self.bound.add(node.rest)
+        self.generic_visit(node)
+
+
+def _exported_names(tree):
+    """Names listed in a literal __all__"""
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets):
+            try:
+                return set(ast.literal_eval(node.value))
+            except ValueError:
+                return set()
+    return set()
+
+
+def _allowed_modules():
+    allowed = set(sys.stdlib_module_names)
+    allowed.update(m.strip() for m in STATIC_ALLOWED_MODULES.split(",") if m.strip())
+    return allowed
+
+
+def check_code(code):
+    """Parse, compile and lint generated code.
+
+    Returns {"ok", "errors", "warnings", "duration"}. Errors are problems that
+    will stop the code from running or break the standard-library-only
+    constraint; warnings (unused imports) are reported but don't fail the gate.
+    """
+    started = time.perf_counter()
+    errors, warnings = [], []
+
+    def verdict():
+        return {
+            "ok": not errors,
+            "errors": errors,
+            "warnings": warnings,
+            "duration": round(time.perf_counter() - started, 4),
+        }
+
+    try:
+        tree = ast.parse(code)
+        compile(code, "<generated>", "exec")
+    except SyntaxError as e:
+        errors.append(f"SyntaxError at line {e.lineno}: {e.msg}")
+        return verdict()
+    except ValueError as e:  # e.g. null bytes in the source
+        errors.append(f"Invalid source: {e}")
+        return verdict()
+
+    names = _Names()
+    names.visit(tree)
+
+    if not names.star_import:
+        known = names.bound | set(dir(builtins)) | MODULE_DUNDERS
+        reported = set()
+        for name, lineno in names.loaded:
+            if name not in known and name not in reported:
+                reported.add(name)
+                errors.append(f"Undefined name '{name}' at line {lineno}")
+
+    allowed = _allowed_modules()
+    for module, lineno in sorted(set(names.imports.values()), key=lambda m: m[1]):
+        top = module.split(".")[0]
+        if not top:
+            errors.append(f"Relative import '{module}' at line {lineno} (code must be a single module)")
+        elif top not in allowed:
+            errors.append(f"Import of non-standard-library module '{top}' at line {lineno}")
+
+    used = {n for n, _ in names.loaded} | _exported_names(tree)
+    for name, (module, lineno) in names.imports.items():
+        if name not in used:
+            warnings.append(f"Unused import '{name}' (from {module}) at line {lineno}")
+
+    return verdict()
+
+
+def format_errors(verdict):
+    """Problems as a bullet list for the regeneration prompt"""
+    return "\n".join(f"- {e}" for e in verdict["errors"])
@@ -0,0 +1,116 @@
+"""
+Static gate false positives: valid code must pass check_code, since every
+wrong error costs a full regeneration (STATIC_GATE_RETRIES)
+"""
+import sys
+import textwrap
+
+import pytest
+
+from src.tools.static_checks import check_code
+
+
+VALID = {
+    "class body dunders": """
+        class Point:
+            kind = __qualname__
+            origin = __module__
+
+            def __repr__(self):
+                return f"{type(self).__qualname__}()"
+    """,
+    "zero-argument super and __class__": """
+        class Base:
+            def __init__(self):
+                self.name = __class__.__name__
+
+        class Child(Base):
+            def __init__(self):
+                super().__init__()
+    """,
+    "closure and nonlocal": """
+        def counter():
+            count = 0
+
+            def increment():
+                nonlocal count
+                count += 1
+                return count
+
+            return increment
+    """,
+    "global bound later": """
+        def show():
+            return LIMIT
+
+        LIMIT = 10
+    """,
+    "comprehension and walrus": """
+        def evens(values):
+            squares = [v * v for v in values if (half := v // 2) * 2 == v]
+            return squares, {k: k for k in range(3)}
+    """,
+    "exception, with and for targets": """
+        def read(path):
+            try:
+                with open(path) as handle:
+                    for index, line in enumerate(handle):
+                        pass
+                return index, line
+            except OSError as error:
+                return str(error)
+    """,
+    "match patterns": """
+        def describe(command):
+            match command:
+                case {"action": action, **rest}:
+                    return action, rest
+                case [first, *others]:
+                    return first, others
+                case str() as text:
+                    return text
+    """,
+    "lambda arguments": """
+        scale = lambda value, *args, factor=2, **kwargs: value * factor
+    """,
+    "module dunders": """
+        if __name__ == "__main__":
+            print(__file__, __doc__)
+    """,
+}
+
+
+@pytest.mark.parametrize("name", sorted(VALID))
+def test_valid_code_passes(name):
+    verdict = check_code(textwrap.dedent(VALID[name]))
+    assert verdict["ok"], verdict["errors"]
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="type parameter syntax")
+def test_type_parameters_are_bound():
+    code = "def first[T](items: list[T]) -> T:\n    return items[0]\n"
+    assert check_code(code)["ok"]
+
+
+def test_star_import_skips_the_undefined_name_check():
+    assert check_code("from math import *\nprint(sqrt(2))\n")["ok"]
+
+
+def test_exported_import_is_not_unused():
+    verdict = check_code('from os import path\n__all__ = ["path"]\n')
+    assert verdict["ok"] and not verdict["warnings"]
+
+
+def test_undefined_name_is_reported():
+    verdict = check_code("def area(r):\n    return pi * r * r\n")
+    assert verdict["errors"] == ["Undefined name 'pi' at line 2"]
+
+
+def test_non_standard_library_import_is_reported():
+    verdict = check_code("import numpy\nprint(numpy.zeros(2))\n")
+    assert verdict["errors"] == ["Import of non-standard-library module 'numpy' at line 1"]
+
+
+def test_syntax_error_is_reported():
+    verdict = check_code("def broken(:\n    pass\n")
+    assert not verdict["ok"] and verdict["errors"][0].startswith("SyntaxError at line 1")